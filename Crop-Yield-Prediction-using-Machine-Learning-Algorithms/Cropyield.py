@@ -18,6 +18,8 @@ from tensorflow.keras import layers
 from tensorflow.keras.models import model_from_json
 import pickle
 from sklearn.preprocessing import StandardScaler
+from preprocessing import CATEGORICAL_COLUMNS, FeatureEncoder
+import analytics
 
 main = tkinter.Tk()
 main.title("Crop Yield Prediction using RNN, Feedforward and LSTM Neural Network")
@@ -31,6 +33,8 @@ global rainfall_dataset
 global crop_dataset
 global le
 scalerX = StandardScaler()
+feature_encoder = None
+PREPROCESSING_PATH = 'model/preprocessing.json'
 
 global weight_for_0
 global weight_for_1
@@ -59,12 +63,13 @@ def preprocess():
     global crop_dataset
     global le
     global X, Y
+    global feature_encoder
     text.delete('1.0', END)
-    le = LabelEncoder()
-    crop_dataset['State_Name'] = pd.Series(le.fit_transform(crop_dataset['State_Name']))
-    crop_dataset['District_Name'] = pd.Series(le.fit_transform(crop_dataset['District_Name']))
-    crop_dataset['Season'] = pd.Series(le.fit_transform(crop_dataset['Season']))
-    crop_dataset['Crop'] = pd.Series(le.fit_transform(crop_dataset['Crop']))
+    # One encoder per column so each keeps its own vocabulary for predict()
+    le = {}
+    for column in CATEGORICAL_COLUMNS:
+        le[column] = LabelEncoder()
+        crop_dataset[column] = pd.Series(le[column].fit_transform(crop_dataset[column]))
     crop_datasets = crop_dataset.values
     cols = crop_datasets.shape[1]-1
     X = crop_datasets[:,0:cols]
@@ -91,6 +96,8 @@ def preprocess():
     print(Y.shape)
     scalerX.fit(X)
     X = scalerX.transform(X)
+    feature_encoder = FeatureEncoder.from_fitted(crop_dataset.columns[0:cols], le, scalerX, avg)
+    feature_encoder.save(PREPROCESSING_PATH)
     text.insert(END,str(X))
 
 def runRNN():
@@ -106,7 +113,6 @@ def runRNN():
             loaded_model_json = json_file.read()
             classifier = model_from_json(loaded_model_json)
         classifier.load_weights("model/rnnmodel_weights.h5")
-        classifier._make_predict_function()   
         print(classifier.summary())
         f = open('model/rnnhistory.pckl', 'rb')
         data = pickle.load(f)
@@ -144,7 +150,6 @@ def runLSTM():
             loaded_model_json = json_file.read()
             classifier1 = model_from_json(loaded_model_json)
         classifier1.load_weights("model/lstmmodel_weights.h5")
-        classifier1._make_predict_function()   
         print(classifier1.summary())
         f = open('model/lstmhistory.pckl', 'rb')
         data = pickle.load(f)
@@ -193,28 +198,25 @@ def runFF():
     
 
 def predict():
+    global feature_encoder
     text.delete('1.0', END)
     file = filedialog.askopenfilename(initialdir="dataset")
-    test = pd.read_csv(file)
-    test['State_Name'] = pd.Series(le.fit_transform(test['State_Name']))
-    test['District_Name'] = pd.Series(le.fit_transform(test['District_Name']))
-    test['Season'] = pd.Series(le.fit_transform(test['Season']))
-    test['Crop'] = pd.Series(le.fit_transform(test['Crop']))
-    test = test.values
-    cols = test.shape[1]
-    test = test[:,0:cols]
-    test = scalerX.fit_transform(test)
-    #test = test.reshape((test.shape[0], test.shape[1], 1)) 
-    print(test.shape)
-    #test = test[:,0:test.shape[1]] 
-    y_pred = classifier.predict(test)
-    for i in range(len(test)):
-        predict = np.argmax(y_pred[i])
-        print(str(predict))
-        if predict == 0:
-            text.insert(END,"X=%s, Predicted = %s" % (test[i], 'Predicted Crop Yield will be LESS')+"\n\n")
-        else:
-            text.insert(END,"X=%s, Predicted = %s" % (test[i], 'Predicted Crop Yield will be HIGH')+"\n\n")
+    if feature_encoder is None:
+        # Encoders and scaler saved with the model when it was trained
+        feature_encoder = FeatureEncoder.load(PREPROCESSING_PATH)
+    for chunk, test, unseen in feature_encoder.transform_csv(file):
+        for column, count in unseen.items():
+            text.insert(END,"%d rows have a %s not seen in training\n" % (count, column))
+        #test = test.reshape((test.shape[0], test.shape[1], 1)) 
+        print(test.shape)
+        y_pred = classifier.predict(test)
+        for i in range(len(test)):
+            predict = np.argmax(y_pred[i])
+            print(str(predict))
+            if predict == 0:
+                text.insert(END,"X=%s, Predicted = %s" % (chunk.values[i], 'Predicted Crop Yield will be LESS')+"\n\n")
+            else:
+                text.insert(END,"X=%s, Predicted = %s" % (chunk.values[i], 'Predicted Crop Yield will be HIGH')+"\n\n")
     
 def graph():
     global rnn_acc,lstm_acc
@@ -226,59 +228,17 @@ def graph():
     plt.show()
 
 def topGraph():
-    global rainfall_dataset
-    global crop_dataset
-    rainfall_dataset = pd.read_csv('dataset/district wise rainfall normal.csv')
-        
-    rainfall = rainfall_dataset.groupby(['STATE_UT_NAME'])['ANNUAL'].agg(['sum'])
-    rainfall = rainfall.sort_values("sum", ascending=False).reset_index()
-    rainfall = rainfall.loc[0:5]
-    print(type(rainfall))
-    rainfall = rainfall.values
-    x1 = []
-    y1 = []
-    for i in range(len(rainfall)):
-        x1.append(str(rainfall[i,0]))
-        y1.append(rainfall[i,1])
-    
-    rice = pd.read_csv('dataset/Agriculture In India.csv')
-    rice.fillna(0, inplace = True)
-    rice['Production'] = rice['Production'].astype(np.int64)
-    rice = rice.groupby(['State_Name','Crop'])['Production'].agg(['sum'])
-    rice = rice.sort_values("sum", ascending=False).reset_index()
-    x2 = []
-    y2 = []
-    rice = rice.values
-    for i in range(len(rice)):
-        if str(rice[i,1]) == 'Rice':
-            x2.append(str(rice[i,0]))
-            y2.append(rice[i,2])
-            if len(x2) > 5:
-                break;
-    x3 = []
-    y3 = []
-    for i in range(len(rice)):
-        if str(rice[i,1]) == 'Coconut':
-            x3.append(str(rice[i,0]))
-            y3.append(rice[i,2])
-            if len(x3) > 5:
-                break;
-    x4 = []
-    y4 = []
-    for i in range(len(rice)):
-        if str(rice[i,1]) == 'Sugarcane':
-            x4.append(str(rice[i,0]))
-            y4.append(rice[i,2])
-            if len(x4) > 5:
-                break;
+    # Cached state x crop production cube; built on the first click, reused afterwards
+    table = analytics.get_analytics()
+
+    def axis(rows, key):
+        return [row['state'] for row in rows], [row[key] for row in rows]
 
-    x5 = []
-    y5 = []
-    for i in range(len(rice)):
-        x5.append(str(rice[i,0]))
-        y5.append(rice[i,2])
-        if len(x5) > 5:
-            break;
+    x1, y1 = axis(table.top_rainfall(6), 'rainfall')
+    x2, y2 = axis(table.top_states('Rice', 6), 'production')
+    x3, y3 = axis(table.top_states('Coconut', 6), 'production')
+    x4, y4 = axis(table.top_states('Sugarcane', 6), 'production')
+    x5, y5 = axis(table.top_pairs(6), 'production')
 
     fig, ax = plt.subplots(5)
     fig.suptitle('Top 6 State Rainfall & Crop Yield')
@@ -0,0 +1,212 @@
+"""
+Production and rainfall analytics behind Cropyield.topGraph()
+A state x crop production cube and per-state rainfall totals are built once from the two CSVs
+(the crop file is streamed in chunks) and cached as .npy arrays keyed by the files' hashes.
+Top-k queries for any crop are an argpartition over one column of the cube.
+Build the cache ahead of time with: python analytics.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+CROP_CSV = 'dataset/Agriculture In India.csv'
+RAINFALL_CSV = 'dataset/district wise rainfall normal.csv'
+CACHE_DIR = 'cache'
+CACHE_VERSION = 1
+CHUNK_SIZE = 100000
+
+
+def name_key(value):
+    return ' '.join(str(value).split()).upper()
+
+
+def top_k(values, k):
+    """Indices of the k largest values, largest first"""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+class ProductionAnalytics:
+    """
+    production[state, crop] is total Production over every year, season and district; rows counts
+    the records behind each cell so crops a state never grew are told apart from a zero harvest.
+    """
+    def __init__(self, states, crops, production, rows, rainfall_states, rainfall):
+        self.states = list(states)
+        self.crops = list(crops)
+        self.production = np.asarray(production, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.rainfall_states = list(rainfall_states)
+        self.rainfall = np.asarray(rainfall, dtype=np.float64)
+        self.crop_index = {name_key(crop): i for i, crop in enumerate(self.crops)}
+
+    def find_crop(self, crop):
+        column = self.crop_index.get(name_key(crop))
+        if column is None:
+            raise Exception(f"Crop '{crop}' not found")
+        return column
+
+    def top_states(self, crop, k=6):
+        """States with the largest total production of a crop"""
+        column = self.find_crop(crop)
+        grown = np.flatnonzero(self.rows[:, column] > 0)
+        values = self.production[grown, column]
+        return [{"state": self.states[grown[i]], "production": int(values[i])} for i in top_k(values, k)]
+
+    def top_crops(self, state, k=6):
+        """A state's largest crops by total production"""
+        keys = [name_key(name) for name in self.states]
+        if name_key(state) not in keys:
+            raise Exception(f"State '{state}' not found")
+        row = keys.index(name_key(state))
+        grown = np.flatnonzero(self.rows[row] > 0)
+        values = self.production[row, grown]
+        return [{"crop": self.crops[grown[i]], "production": int(values[i])} for i in top_k(values, k)]
+
+    def top_pairs(self, k=6):
+        """The largest (state, crop) totals across every crop"""
+        grown = np.flatnonzero(self.rows.ravel() > 0)
+        values = self.production.ravel()[grown]
+        width = len(self.crops)
+        return [{"state": self.states[grown[i] // width], "crop": self.crops[grown[i] % width],
+                 "production": int(values[i])} for i in top_k(values, k)]
+
+    def top_rainfall(self, k=6):
+        """States with the largest sum of district annual rainfall normals"""
+        return [{"state": self.rainfall_states[i], "rainfall": round(float(self.rainfall[i]), 1)}
+                for i in top_k(self.rainfall, k)]
+
+
+def build(crop_csv=CROP_CSV, rainfall_csv=RAINFALL_CSV, chunk_size=CHUNK_SIZE):
+    """Aggregate both CSVs; the crop file is read in chunks of chunk_size rows"""
+    states, crops = {}, {}
+    cells = {}
+    for chunk in pd.read_csv(crop_csv, usecols=['State_Name', 'Crop', 'Production'], chunksize=chunk_size):
+        # Same cleaning as Cropyield.upload()
+        chunk['Production'] = chunk['Production'].fillna(0).astype(np.int64)
+        sums = chunk.groupby(['State_Name', 'Crop'], sort=False)['Production'].agg(['sum', 'size'])
+        for (state, crop), (total, count) in zip(sums.index, sums.to_numpy()):
+            cell = (states.setdefault(state, len(states)), crops.setdefault(crop, len(crops)))
+            production, rows = cells.get(cell, (0, 0))
+            cells[cell] = (production + int(total), rows + int(count))
+
+    production = np.zeros((len(states), len(crops)), dtype=np.int64)
+    rows = np.zeros((len(states), len(crops)), dtype=np.int64)
+    if cells:
+        index = np.array(list(cells.keys()))
+        values = np.array(list(cells.values()), dtype=np.int64)
+        production[index[:, 0], index[:, 1]] = values[:, 0]
+        rows[index[:, 0], index[:, 1]] = values[:, 1]
+
+    rainfall = pd.read_csv(rainfall_csv, usecols=['STATE_UT_NAME', 'ANNUAL'])
+    rainfall = rainfall.groupby('STATE_UT_NAME')['ANNUAL'].sum()
+    return ProductionAnalytics(list(states), list(crops), production, rows,
+                               rainfall.index.tolist(), rainfall.to_numpy())
+
+
+def sources_sha256(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, "analytics.npy"), os.path.join(cache_dir, "analytics.json")
+
+
+def save_cache(table, source_hash, cache_dir=CACHE_DIR):
+    """Production and row counts stacked in one .npy, names and rainfall in .json; both replaced atomically"""
+    os.makedirs(cache_dir, exist_ok=True)
+    values_path, meta_path = cache_paths(cache_dir)
+    suffix = f".{os.getpid()}.tmp"
+
+    with open(values_path + suffix, 'wb') as file:
+        np.save(file, np.stack([table.production, table.rows]))
+    os.replace(values_path + suffix, values_path)
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source_sha256": source_hash,
+        "states": table.states,
+        "crops": table.crops,
+        "rainfall_states": table.rainfall_states,
+        "rainfall": table.rainfall.tolist(),
+    }
+    with open(meta_path + suffix, 'w') as file:
+        json.dump(meta, file)
+    os.replace(meta_path + suffix, meta_path)
+
+
+def load_cache(source_hash, cache_dir=CACHE_DIR):
+    """Memory-map a cache built from the same files, or return None"""
+    values_path, meta_path = cache_paths(cache_dir)
+    try:
+        with open(meta_path) as file:
+            meta = json.load(file)
+        if meta.get("version") != CACHE_VERSION or meta.get("source_sha256") != source_hash:
+            return None
+        values = np.load(values_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    if values.shape != (2, len(meta["states"]), len(meta["crops"])):
+        return None
+    return ProductionAnalytics(meta["states"], meta["crops"], values[0], values[1],
+                               meta["rainfall_states"], meta["rainfall"])
+
+
+def load_or_build(crop_csv=CROP_CSV, rainfall_csv=RAINFALL_CSV, cache_dir=CACHE_DIR):
+    """Map the cache if it matches both CSVs, otherwise rebuild it"""
+    start = time.perf_counter()
+    source_hash = sources_sha256([crop_csv, rainfall_csv])
+
+    table = load_cache(source_hash, cache_dir)
+    if table is not None:
+        print(f"✓ Production analytics mapped from cache ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return table
+
+    table = build(crop_csv, rainfall_csv)
+    try:
+        save_cache(table, source_hash, cache_dir)
+    except OSError as e:
+        print(f"⚠ Could not write analytics cache: {e}")
+    print(f"✓ Production analytics built ({len(table.states)} states x {len(table.crops)} crops, "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+    return table
+
+
+# Global table, loaded on first use
+analytics = None
+
+
+def get_analytics():
+    global analytics
+    if analytics is None:
+        analytics = load_or_build()
+    return analytics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the production / rainfall cube used by topGraph and the API")
+    parser.add_argument('--crop-csv', default=CROP_CSV)
+    parser.add_argument('--rainfall-csv', default=RAINFALL_CSV)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build(args.crop_csv, args.rainfall_csv)
+    save_cache(table, sources_sha256([args.crop_csv, args.rainfall_csv]), args.cache_dir)
+    print(f"✓ Wrote {len(table.states)} states x {len(table.crops)} crops to {args.cache_dir} "
+          f"in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,442 @@
+"""
+Streaming preprocessing for Agriculture In India.csv
+Two chunked passes over the CSV replace Cropyield.preprocess(): the first collects each text
+column's vocabulary with row counts, running mean / variance of the numeric features and the
+target mean; the second encodes, labels and scales every chunk and writes it as a .npy shard.
+Trainers memory-map one shard at a time, so memory is bounded by the chunk size, not the file.
+Shuffling permutes the shard order and the rows within each shard, never rows across shards,
+so CHUNK_SIZE is kept small enough that even a small dataset is split into several shards.
+The fitted state is a FeatureEncoder, saved with each model as preprocessing.json for inference.
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+
+DATASET = 'dataset/Agriculture In India.csv'
+CATEGORICAL_COLUMNS = ['State_Name', 'District_Name', 'Season', 'Crop']
+TARGET_COLUMN = 'Production'
+CHUNK_SIZE = 10000
+PREPROCESSING_FILE = 'preprocessing.json'
+
+# Bump when the shard layout or the preprocessing changes so caches are rebuilt
+SHARD_VERSION = 1
+
+
+def clean(chunk):
+    """The cleaning Cropyield.upload() applies to the raw CSV"""
+    chunk = chunk.fillna(0)
+    chunk[TARGET_COLUMN] = chunk[TARGET_COLUMN].astype(np.int64)
+    return chunk
+
+
+def target_bytes(production):
+    """
+    Production modulo 256, the value Cropyield.preprocess() labels on: it casts Production to
+    uint8, which wraps on the platforms the shipped models were trained on (a float64 -> uint8
+    cast of an out-of-range value is undefined, so the wrap is done here in int64 instead).
+    The result is not a measure of yield, so the LESS / HIGH labels are close to noise; this is
+    kept only so models trained here stay comparable with the GUI's and the saved threshold.
+    """
+    return np.mod(np.asarray(production, dtype=np.int64), 256).astype('uint8')
+
+
+def balanced_class_weight(counts):
+    """rows / (2 * rows of class c), so each class contributes equally to the loss"""
+    counts = np.asarray(counts, dtype=np.float64)
+    return {label: float(counts.sum() / (len(counts) * count)) if count else 0.0
+            for label, count in enumerate(counts)}
+
+
+def read_chunks(path=DATASET, chunk_size=CHUNK_SIZE):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        yield clean(chunk)
+
+
+def load_dataset(path=DATASET, chunk_size=CHUNK_SIZE):
+    """The whole cleaned dataset in memory, as Cropyield.upload() loads it"""
+    return pd.concat(read_chunks(path, chunk_size), ignore_index=True)
+
+
+def preprocess(crop_dataset):
+    """
+    In-memory reference for the streaming passes: Cropyield.preprocess() without the globals.
+    Returns (X, Y, encoders, scaler, class_weight).
+    """
+    crop_dataset = crop_dataset.copy()
+    encoders = {}
+    for column in CATEGORICAL_COLUMNS:
+        encoders[column] = LabelEncoder()
+        crop_dataset[column] = encoders[column].fit_transform(crop_dataset[column])
+
+    values = crop_dataset.values
+    cols = values.shape[1] - 1
+    X = values[:, 0:cols].astype(np.float64)
+    Y = target_bytes(values[:, cols])
+
+    labels = (Y >= np.average(Y)).astype('uint8')
+    Y = np.eye(2, dtype='uint8')[labels]
+
+    # Not the GUI's 1 / np.bincount(Y[:, 0]): that counts the wrong column, so each class was
+    # weighted by the other's size, and weights around 3e-5 all but switch the loss off
+    class_weight = balanced_class_weight(np.bincount(labels, minlength=2))
+
+    scaler = StandardScaler()
+    X = scaler.fit_transform(X)
+    return X, Y, encoders, scaler, class_weight
+
+
+class CategoryCounts:
+    """Streaming vocabulary of one text column: value -> rows seen"""
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, values):
+        for value, count in values.value_counts(sort=False).items():
+            value = value.item() if hasattr(value, 'item') else value
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+
+    def classes(self):
+        """Sorted, so codes match LabelEncoder's"""
+        return sorted(self.counts)
+
+    def moments(self):
+        """Mean and variance of the codes, from the counts alone"""
+        counts = np.array([self.counts[value] for value in self.classes()], dtype=np.float64)
+        codes = np.arange(len(counts), dtype=np.float64)
+        total = counts.sum()
+        mean = (codes * counts).sum() / total
+        return mean, (counts * (codes - mean) ** 2).sum() / total
+
+
+class RunningMoments:
+    """Per-column mean / variance merged chunk by chunk (Chan et al.)"""
+    def __init__(self, width):
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        count = len(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def var(self):
+        return self.m2 / self.count if self.count else self.m2
+
+
+def scan(path=DATASET, chunk_size=CHUNK_SIZE):
+    """First pass: feature names, vocabularies, feature moments and the target threshold"""
+    features = None
+    vocabularies = {column: CategoryCounts() for column in CATEGORICAL_COLUMNS}
+    numeric = None
+    target_sum = 0
+    rows = 0
+
+    for chunk in read_chunks(path, chunk_size):
+        if features is None:
+            # Like the GUI, every column but the last is a feature
+            features = list(chunk.columns[:-1])
+            numeric_columns = [column for column in features if column not in vocabularies]
+            numeric = RunningMoments(len(numeric_columns))
+        for column in CATEGORICAL_COLUMNS:
+            vocabularies[column].update(chunk[column])
+        numeric.update(chunk[numeric_columns].to_numpy(dtype=np.float64))
+        target_sum += int(target_bytes(chunk[chunk.columns[-1]]).sum(dtype=np.int64))
+        rows += len(chunk)
+
+    if not rows:
+        raise Exception(f"No rows in {path}")
+
+    mean = np.empty(len(features))
+    var = np.empty(len(features))
+    for i, column in enumerate(features):
+        if column in vocabularies:
+            mean[i], var[i] = vocabularies[column].moments()
+        else:
+            j = numeric_columns.index(column)
+            mean[i], var[i] = numeric.mean[j], numeric.var[j]
+
+    return {
+        "rows": rows,
+        "features": features,
+        "categorical": {column: vocabularies[column].classes() for column in CATEGORICAL_COLUMNS},
+        "scaler": {"mean": mean.tolist(), "var": var.tolist(), "scale": scale_from_var(var).tolist()},
+        "target_threshold": target_sum / rows,
+    }
+
+
+def scale_from_var(var):
+    """Standard deviations with zeros replaced by 1, as StandardScaler does"""
+    scale = np.sqrt(np.asarray(var, dtype=np.float64))
+    return np.where(scale < 10 * np.finfo(scale.dtype).eps, 1.0, scale)
+
+
+class FeatureEncoder:
+    """
+    Fitted per-column encoders and scaler, applied as precomputed lookup arrays. Each text
+    column's table holds the already-scaled value of every known category plus a final slot
+    for unseen ones, which get the column mean (0 after scaling) instead of an error.
+    """
+    def __init__(self, meta):
+        self.features = list(meta["features"])
+        self.categorical = {column: list(classes) for column, classes in meta["categorical"].items()}
+        self.mean = np.asarray(meta["scaler"]["mean"], dtype=np.float64)
+        self.scale = np.asarray(meta["scaler"]["scale"], dtype=np.float64)
+        self.target_threshold = meta.get("target_threshold")
+
+        self.exact = {}
+        self.loose = {}
+        self.tables = {}
+        for column, classes in self.categorical.items():
+            i = self.features.index(column)
+            self.exact[column] = pd.Index(classes)
+            # Case / whitespace-insensitive fallback, e.g. 'Kharif' for 'Kharif     '
+            loose = {}
+            for code, value in enumerate(classes):
+                loose.setdefault(self.loose_key(value), code)
+            self.loose[column] = (pd.Index(list(loose)), np.array(list(loose.values()) + [-1]))
+            scaled = (np.arange(len(classes)) - self.mean[i]) / self.scale[i]
+            self.tables[column] = np.append(scaled, 0.0).astype(np.float32)
+
+    @staticmethod
+    def loose_key(value):
+        return ' '.join(str(value).split()).upper()
+
+    @classmethod
+    def from_fitted(cls, features, encoders, scaler, target_threshold=None):
+        """Wrap LabelEncoders and a StandardScaler fitted in memory"""
+        return cls({
+            "features": list(features),
+            "categorical": {column: encoder.classes_.tolist() for column, encoder in encoders.items()},
+            "scaler": {"mean": scaler.mean_.tolist(), "var": scaler.var_.tolist(), "scale": scaler.scale_.tolist()},
+            "target_threshold": None if target_threshold is None else float(target_threshold),
+        })
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls(json.load(file))
+
+    def save(self, path):
+        meta = {
+            "features": self.features,
+            "categorical": self.categorical,
+            "scaler": {"mean": self.mean.tolist(), "var": (self.scale ** 2).tolist(), "scale": self.scale.tolist()},
+            "target_threshold": self.target_threshold,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, path)
+
+    def codes(self, column, values):
+        """Category codes for a column's values; -1 where the category was never seen"""
+        values = pd.Series(values)
+        codes = self.exact[column].get_indexer(values)
+        missing = codes < 0
+        if missing.any():
+            index, loose_codes = self.loose[column]
+            keys = values[missing].map(self.loose_key)
+            codes[missing] = loose_codes[index.get_indexer(keys)]
+        return codes
+
+    def transform(self, frame):
+        """
+        (X, unseen) for a DataFrame holding the feature columns: scaled float32 features and a
+        {column: rows with an unseen category} count
+        """
+        missing = [column for column in self.features if column not in frame.columns]
+        if missing:
+            raise Exception(f"Missing columns: {', '.join(missing)}")
+
+        X = np.empty((len(frame), len(self.features)), dtype=np.float32)
+        unseen = {}
+        for i, column in enumerate(self.features):
+            if column in self.tables:
+                codes = self.codes(column, frame[column])
+                X[:, i] = self.tables[column][codes]
+                unseen[column] = int((codes < 0).sum())
+            else:
+                values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+                # Missing numbers fall back to the column mean, like unseen categories
+                X[:, i] = np.nan_to_num((values - self.mean[i]) / self.scale[i])
+        return X, {column: count for column, count in unseen.items() if count}
+
+    def transform_csv(self, path, chunk_size=CHUNK_SIZE):
+        """(chunk, X, unseen) for each chunk of a CSV, so any file size can be scored"""
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            X, unseen = self.transform(chunk)
+            yield chunk, X, unseen
+
+
+def encode_chunk(chunk, encoder, target_threshold):
+    """Scaled float32 features and one-hot uint8 labels for one cleaned chunk"""
+    X, _ = encoder.transform(chunk)
+    labels = (target_bytes(chunk[chunk.columns[-1]]) >= target_threshold).astype('uint8')
+    return X, np.eye(2, dtype='uint8')[labels]
+
+
+def write_shards(directory, path=DATASET, chunk_size=CHUNK_SIZE, dataset_hash=None):
+    """Both passes; writes shard_NNNNN_{X,Y}.npy and manifest.json into `directory` atomically"""
+    start = time.perf_counter()
+    meta = scan(path, chunk_size)
+    encoder = FeatureEncoder(meta)
+
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shards = []
+    class_counts = np.zeros(2, dtype=np.int64)
+    for i, chunk in enumerate(read_chunks(path, chunk_size)):
+        X, Y = encode_chunk(chunk, encoder, meta["target_threshold"])
+        np.save(os.path.join(tmp_dir, f"shard_{i:05d}_X.npy"), X)
+        np.save(os.path.join(tmp_dir, f"shard_{i:05d}_Y.npy"), Y)
+        shards.append(len(X))
+        class_counts += Y.sum(axis=0, dtype=np.int64)
+
+    meta.update({
+        "version": SHARD_VERSION,
+        "dataset": path,
+        "dataset_sha256": dataset_hash,
+        "chunk_size": chunk_size,
+        "shards": shards,
+        "class_counts": class_counts.tolist(),
+        "class_weight": {str(label): weight for label, weight in balanced_class_weight(class_counts).items()},
+    })
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as file:
+        json.dump(meta, file)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    print(f"✓ Preprocessed {meta['rows']} rows into {len(shards)} shards in {time.perf_counter() - start:.1f}s")
+    return ShardSet(directory)
+
+
+class ShardSet:
+    """A directory of memory-mapped training shards plus the fitted preprocessing state"""
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as file:
+            self.meta = json.load(file)
+        if self.meta.get("version") != SHARD_VERSION:
+            raise Exception(f"Shards in {directory} are version {self.meta.get('version')}, expected {SHARD_VERSION}")
+        self.sizes = self.meta["shards"]
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def input_dim(self):
+        return len(self.meta["features"])
+
+    def shard(self, i):
+        """(X, Y) of one shard, memory-mapped"""
+        X = np.load(os.path.join(self.directory, f"shard_{i:05d}_X.npy"), mmap_mode='r')
+        Y = np.load(os.path.join(self.directory, f"shard_{i:05d}_Y.npy"), mmap_mode='r')
+        return X, Y
+
+    def arrays(self):
+        """Every shard concatenated; only for datasets that fit in memory"""
+        shards = [self.shard(i) for i in range(len(self.sizes))]
+        return np.concatenate([X for X, _ in shards]), np.concatenate([Y for _, Y in shards])
+
+    def encoders(self):
+        encoders = {}
+        for column, classes in self.meta["categorical"].items():
+            encoders[column] = LabelEncoder()
+            encoders[column].classes_ = np.array(classes, dtype=object)
+        return encoders
+
+    def scaler(self):
+        scaler = StandardScaler()
+        scaler.mean_ = np.array(self.meta["scaler"]["mean"])
+        scaler.var_ = np.array(self.meta["scaler"]["var"])
+        scaler.scale_ = np.array(self.meta["scaler"]["scale"])
+        scaler.n_samples_seen_ = self.meta["rows"]
+        scaler.n_features_in_ = self.input_dim
+        return scaler
+
+    def feature_encoder(self):
+        return FeatureEncoder(self.meta)
+
+    def class_weight(self):
+        return {int(label): weight for label, weight in self.meta["class_weight"].items()}
+
+    def holdout(self, i, fraction, seed):
+        """Validation mask for shard i; depends only on (seed, i) so it never has to be stored"""
+        if fraction <= 0:
+            return np.zeros(self.sizes[i], dtype=bool)
+        return np.random.default_rng([seed, i]).random(self.sizes[i]) < fraction
+
+    def split_rows(self, fraction, seed):
+        """(train rows, validation rows) per shard"""
+        validation = [int(self.holdout(i, fraction, seed).sum()) for i in range(len(self.sizes))]
+        return [size - held for size, held in zip(self.sizes, validation)], validation
+
+    def steps(self, batch_size, fraction=0.0, seed=0, validation=False):
+        train, held = self.split_rows(fraction, seed)
+        return sum(-(-rows // batch_size) for rows in (held if validation else train))
+
+    def batches(self, batch_size, fraction=0.0, seed=0, validation=False, shuffle=True, repeat=True,
+                transform=None):
+        """
+        (X, Y) batches over the train or validation rows. Each epoch visits the shards in a
+        seeded random order and shuffles rows within a shard; only one shard is read at a time.
+        """
+        epoch = 0
+        while True:
+            rng = np.random.default_rng([seed, epoch, 1])
+            order = rng.permutation(len(self.sizes)) if shuffle else range(len(self.sizes))
+            for i in order:
+                rows = np.flatnonzero(self.holdout(i, fraction, seed) == validation)
+                if len(rows) == 0:
+                    continue
+                X, Y = self.shard(i)
+                X, Y = X[rows], Y[rows]
+                if shuffle:
+                    permutation = rng.permutation(len(rows))
+                    X, Y = X[permutation], Y[permutation]
+                for begin in range(0, len(rows), batch_size):
+                    batch = X[begin:begin + batch_size]
+                    yield (transform(batch) if transform else batch), Y[begin:begin + batch_size]
+            epoch += 1
+            if not repeat:
+                return
+
+
+def shard_dir(dataset_hash, cache_dir, chunk_size=CHUNK_SIZE):
+    """Keyed by layout version, dataset and shard size, so changing any of them never reuses old shards"""
+    return os.path.join(cache_dir, f"shards_v{SHARD_VERSION}_{dataset_hash[:16]}_{chunk_size}")
+
+
+def prepare(path=DATASET, cache_dir='cache', chunk_size=CHUNK_SIZE, dataset_hash=None, use_cache=True):
+    """The shard set for a dataset, reusing the cached one when the dataset hash matches"""
+    directory = shard_dir(dataset_hash, cache_dir, chunk_size)
+    if use_cache and os.path.exists(os.path.join(directory, "manifest.json")):
+        try:
+            shards = ShardSet(directory)
+            if shards.meta.get("chunk_size") != chunk_size or shards.meta.get("dataset_sha256") != dataset_hash:
+                raise Exception(f"shards in {directory} were built with other settings")
+            print(f"✓ Preprocessed shards loaded from {directory}")
+            return shards
+        except Exception as e:
+            print(f"⚠ Rebuilding shards: {e}")
+    os.makedirs(cache_dir, exist_ok=True)
+    return write_shards(directory, path, chunk_size, dataset_hash)
@@ -0,0 +1,267 @@
+"""
+Headless training pipeline for the Cropyield models
+Runs the same upload -> preprocess -> RNN / LSTM / Feed Forward steps as the Tkinter app in
+Cropyield.py, without a display. Preprocessing streams the CSV into memory-mapped shards cached
+by dataset hash (see preprocessing.py), every run gets a versioned artifact directory with
+metrics, and seeds / thread counts are fixed for reproducibility.
+Run with: python train_pipeline.py --models rnn lstm ff --seed 42 --threads 4
+"""
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import sys
+import time
+
+import numpy as np
+
+import preprocessing
+from preprocessing import CHUNK_SIZE, DATASET
+
+
+CACHE_DIR = 'cache'
+RUNS_DIR = 'model/runs'
+MODEL_DIR = 'model'
+
+MODELS = ['rnn', 'lstm', 'ff']
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def configure_runtime(seed, threads):
+    """
+    Fix every seed and the thread pools. Must run before TensorFlow is first imported:
+    the thread settings only apply to a runtime that has not started yet.
+    """
+    os.environ['PYTHONHASHSEED'] = str(seed)
+    os.environ['TF_DETERMINISTIC_OPS'] = '1'
+    if threads:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+        os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def configure_tensorflow(seed, threads):
+    import tensorflow as tf
+
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.random.set_seed(seed)
+    if hasattr(tf.config.experimental, 'enable_op_determinism'):
+        tf.config.experimental.enable_op_determinism()
+    return tf
+
+
+def build_rnn(input_dim, outputs):
+    """Same layers as Cropyield.runRNN()"""
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.models import Sequential
+
+    rnn = Sequential()
+    rnn.add(Dense(256, input_dim=input_dim, activation='relu', kernel_initializer="uniform"))
+    rnn.add(Dense(128, activation='relu', kernel_initializer="uniform"))
+    rnn.add(Dense(outputs, activation='softmax', kernel_initializer="uniform"))
+    rnn.compile(loss='binary_crossentropy', optimizer='adam', metrics=['accuracy'])
+    return rnn
+
+
+def build_lstm(input_dim, outputs):
+    """Same layers as Cropyield.runLSTM(); expects inputs shaped (rows, features, 1)"""
+    from tensorflow.keras import layers
+    from tensorflow.keras.layers import Dense, Dropout
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential()
+    model.add(layers.LSTM(512, input_shape=(input_dim, 1)))
+    model.add(Dropout(0.5))
+    model.add(Dense(256, activation='relu'))
+    model.add(Dense(outputs, activation='softmax'))
+    model.compile(loss='categorical_crossentropy', optimizer='adam', metrics=['accuracy'])
+    return model
+
+
+def build_ff(input_dim, outputs):
+    """Same layers as Cropyield.runFF()"""
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential([
+        Dense(64, activation='relu', input_shape=(input_dim,)),
+        Dense(64, activation='relu'),
+        Dense(outputs, activation='softmax')])
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+BUILDERS = {'rnn': build_rnn, 'lstm': build_lstm, 'ff': build_ff}
+
+
+def model_inputs(name, X):
+    return X.reshape((X.shape[0], X.shape[1], 1)) if name == 'lstm' else X
+
+
+def weights_filename(name):
+    """Keras 3 insists on a .weights.h5 suffix; Keras 2 keeps the GUI's naming"""
+    import tensorflow as tf
+
+    major = int(tf.keras.__version__.split('.')[0]) if hasattr(tf.keras, '__version__') else 2
+    return f"{name}model.weights.h5" if major >= 3 else f"{name}model_weights.h5"
+
+
+def train_model(name, shards, class_weight, epochs, batch_size, validation_split, seed):
+    """Fit one model on the shard set, streaming batches; returns (model, metrics)"""
+    model = BUILDERS[name](shards.input_dim, 2)
+    # Only the RNN is trained with class weights in the GUI
+    fit_kwargs = {'class_weight': class_weight} if name == 'rnn' else {}
+
+    def batches(validation):
+        return shards.batches(batch_size, validation_split, seed, validation=validation,
+                              shuffle=not validation, repeat=not validation,
+                              transform=lambda X: model_inputs(name, X))
+
+    start = time.perf_counter()
+    history = model.fit(batches(False), steps_per_epoch=shards.steps(batch_size, validation_split, seed),
+                        epochs=epochs, verbose=2, **fit_kwargs)
+    train_seconds = time.perf_counter() - start
+
+    accuracy = [float(value) for value in history.history['accuracy']]
+    metrics = {
+        "train_accuracy": accuracy,
+        "train_loss": [float(value) for value in history.history['loss']],
+        "train_seconds": round(train_seconds, 2),
+        "parameters": int(model.count_params()),
+    }
+    validation_steps = shards.steps(batch_size, validation_split, seed, validation=True)
+    if validation_steps:
+        val_loss, val_accuracy = model.evaluate(batches(True), steps=validation_steps, verbose=0)
+        metrics["val_accuracy"] = float(val_accuracy)
+        metrics["val_loss"] = float(val_loss)
+    return model, metrics
+
+
+def save_model(model, name, history, directory):
+    """Write <name>model.json, the weights and <name>history.pckl as the GUI expects them"""
+    with open(os.path.join(directory, f"{name}model.json"), "w") as json_file:
+        json_file.write(model.to_json())
+    model.save_weights(os.path.join(directory, weights_filename(name)))
+    with open(os.path.join(directory, f"{name}history.pckl"), 'wb') as file:
+        pickle.dump(history, file)
+
+
+def new_run_dir(runs_dir, dataset_hash):
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '_' + dataset_hash[:8]
+    directory = os.path.join(runs_dir, version)
+    os.makedirs(directory, exist_ok=False)
+    return version, directory
+
+
+def publish(run_dir, models, model_dir=MODEL_DIR):
+    """Copy a run's artifacts to model/, where Cropyield.py and the serving code load them"""
+    shutil.copy2(os.path.join(run_dir, preprocessing.PREPROCESSING_FILE),
+                 os.path.join(model_dir, preprocessing.PREPROCESSING_FILE))
+    for name in models:
+        for filename in os.listdir(run_dir):
+            if filename.startswith(f"{name}model") or filename == f"{name}history.pckl":
+                shutil.copy2(os.path.join(run_dir, filename), os.path.join(model_dir, filename))
+
+
+def run(dataset=DATASET, models=MODELS, epochs=2, batch_size=64, seed=42, threads=None,
+        validation_split=0.2, chunk_size=CHUNK_SIZE, cache_dir=CACHE_DIR, runs_dir=RUNS_DIR,
+        use_cache=True, publish_models=False):
+    """Train the requested models and return the run's metrics"""
+    configure_runtime(seed, threads)
+    dataset_hash = file_sha256(dataset)
+    shards = preprocessing.prepare(dataset, cache_dir, chunk_size, dataset_hash, use_cache)
+    class_weight = shards.class_weight()
+    train_rows, validation_rows = shards.split_rows(validation_split, seed)
+
+    report = {
+        "dataset": dataset,
+        "dataset_sha256": dataset_hash,
+        "rows": len(shards),
+        "shards": len(shards.sizes),
+        "train_rows": sum(train_rows),
+        "validation_rows": sum(validation_rows),
+        "class_counts": shards.meta["class_counts"],
+        "seed": seed,
+        "threads": threads,
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "models": {},
+    }
+    if not models:
+        return report
+
+    tf = configure_tensorflow(seed, threads)
+    report["tensorflow"] = tf.__version__
+
+    version, run_dir = new_run_dir(runs_dir, dataset_hash)
+    report["version"] = version
+    # The encoders and scaler the models are trained with, for inference
+    shards.feature_encoder().save(os.path.join(run_dir, preprocessing.PREPROCESSING_FILE))
+
+    for name in models:
+        print(f"Training {name.upper()}...")
+        # Reseed per model so each one's initial weights don't depend on which ran before it
+        tf.random.set_seed(seed)
+        model, metrics = train_model(name, shards, class_weight, epochs, batch_size, validation_split, seed)
+        save_model(model, name, metrics["train_accuracy"], run_dir)
+        report["models"][name] = metrics
+        print(f"✓ {name.upper()} train accuracy {metrics['train_accuracy'][-1] * 100:.2f}%"
+              + (f", validation {metrics['val_accuracy'] * 100:.2f}%" if 'val_accuracy' in metrics else ""))
+
+    with open(os.path.join(run_dir, 'metrics.json'), 'w') as file:
+        json.dump(report, file, indent=2)
+    with open(os.path.join(runs_dir, 'LATEST'), 'w') as file:
+        file.write(version + '\n')
+
+    if publish_models:
+        publish(run_dir, models)
+        print(f"✓ Published {', '.join(models)} to {MODEL_DIR}/")
+    print(f"✓ Run {version} written to {run_dir}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Cropyield RNN / LSTM / Feed Forward models without the GUI")
+    parser.add_argument('--dataset', default=DATASET)
+    parser.add_argument('--models', nargs='*', choices=MODELS, default=MODELS,
+                        help="Models to train; pass none to only preprocess")
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threads', type=int, help="TensorFlow / BLAS threads (default: all cores)")
+    parser.add_argument('--validation-split', type=float, default=0.2,
+                        help="Held-out fraction for validation metrics; 0 trains on everything like the GUI")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per CSV read and per training shard")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--runs-dir', default=RUNS_DIR)
+    parser.add_argument('--no-cache', action='store_true', help="Rebuild the preprocessed shards even if cached")
+    parser.add_argument('--publish', action='store_true', help="Copy the new artifacts to model/ for the GUI and serving")
+    args = parser.parse_args(argv)
+
+    report = run(
+        dataset=args.dataset, models=args.models, epochs=args.epochs, batch_size=args.batch_size,
+        seed=args.seed, threads=args.threads, validation_split=args.validation_split,
+        chunk_size=args.chunk_size, cache_dir=args.cache_dir, runs_dir=args.runs_dir,
+        use_cache=not args.no_cache, publish_models=args.publish,
+    )
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,34 @@
 Plant Disease Detection API
 Uses PyTorch CNN model to detect plant diseases from leaf images
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, ConfigDict
-from PIL import Image
 import torch
 from torchvision import transforms
-import io
 import os
 import base64
+import hashlib
+import threading
+import time
+import zipfile
+from utils import executor, image_pipeline
+from utils.micro_batcher import MicroBatcher
+from utils.result_cache import ResultCache
 
-app = FastAPI(title="Plant Disease Detection API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm the model in the background so the first request doesn't pay for it
+    if WARM_START:
+        threading.Thread(target=warm_start, name="disease-warm-start", daemon=True).start()
+    yield
+    await batcher.close()
+
+
+app = FastAPI(title="Plant Disease Detection API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -84,6 +101,17 @@ disease_treatments = {
 
 # Global variable for model
 model = None
+model_lock = threading.Lock()
+
+# Lifecycle of the model for /healthz and /readyz
+model_state = {
+    "status": "not_loaded",  # not_loaded -> loading -> warming_up -> ready (or failed)
+    "load_time_ms": None,
+    "warmup_ms": None,
+    "error": None,
+}
+
+WARM_START = os.environ.get("DISEASE_WARM_START", "1") != "0"
 
 class PlantDiseaseModel(torch.nn.Module):
     """Custom CNN architecture for plant disease detection"""
@@ -145,12 +173,19 @@ class PlantDiseaseModel(torch.nn.Module):
         return x
 
 
-def load_model():
-    """Load the PyTorch model"""
-    global model
-    
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(script_dir, "plant_disease_model_1.pt")
+def is_torchscript(model_path):
+    """TorchScript archives are zip files with a code/ directory; torch.save checkpoints are not"""
+    if not zipfile.is_zipfile(model_path):
+        return False
+    with zipfile.ZipFile(model_path) as archive:
+        return any('/code/' in name for name in archive.namelist())
+
+
+def load_model(model_path=None):
+    """Load the PyTorch model (a checkpoint, or a TorchScript artifact from disease_export.py)"""
+    if model_path is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        model_path = os.environ.get("DISEASE_MODEL_PATH", os.path.join(script_dir, "plant_disease_model_1.pt"))
     
     print(f"Looking for model at: {model_path}")
     
@@ -160,19 +195,26 @@ def load_model():
         return None
     
     try:
+        # Built locally: the global is only set by publish_model() once this is in eval mode
+        if is_torchscript(model_path):
+            net = torch.jit.load(model_path, map_location=torch.device('cpu'))
+            net.eval()
+            print("✓ Loaded TorchScript model")
+            return net
+
         checkpoint = torch.load(model_path, map_location=torch.device('cpu'), weights_only=False)
-        model = PlantDiseaseModel(num_classes=39)
         
         if isinstance(checkpoint, dict):
-            model.load_state_dict(checkpoint, strict=False)
+            net = PlantDiseaseModel(num_classes=39)
+            net.load_state_dict(checkpoint, strict=False)
             print("✓ Loaded state_dict into custom model")
         else:
-            model = checkpoint
+            net = checkpoint
             print("✓ Loaded full model")
         
-        model.eval()
+        net.eval()
         print("✓ Model loaded successfully!")
-        return model
+        return net
     except Exception as e:
         print(f"✗ Error loading model: {e}")
         import traceback
@@ -189,61 +231,266 @@ transform = transforms.Compose([
 ])
 
 
-def predict_disease(image_bytes):
-    """Predict disease from image bytes"""
+def format_prediction(probabilities):
+    """Turn one row of class probabilities into the API result dict"""
+    confidence, predicted = torch.max(probabilities, 0)
+
+    predicted_class_idx = predicted.item()
+    confidence_score = confidence.item() * 100
+
+    disease_name = disease_classes[predicted_class_idx]
+    parts = disease_name.split('___')
+    plant_name = parts[0].replace('_', ' ')
+    disease = parts[1].replace('_', ' ') if len(parts) > 1 else 'Unknown'
+
+    treatment = disease_treatments.get(disease_name, 'Consult with agricultural expert for specific treatment recommendations.')
+
+    if 'healthy' in disease.lower():
+        severity = 'Healthy'
+        color = 'green'
+    elif confidence_score > 80:
+        severity = 'High Confidence Detection'
+        color = 'red' if 'healthy' not in disease.lower() else 'green'
+    elif confidence_score > 60:
+        severity = 'Moderate Confidence'
+        color = 'orange'
+    else:
+        severity = 'Low Confidence - Further inspection needed'
+        color = 'yellow'
+
+    return {
+        'success': True,
+        'plant': plant_name,
+        'disease': disease,
+        'confidence': round(confidence_score, 2),
+        'severity': severity,
+        'color': color,
+        'treatment': treatment,
+        'raw_prediction': disease_name
+    }
+
+
+def publish_model():
+    """Load the model and make it the global one, tracking model_state. Call with model_lock held."""
     global model
-    
+
+    model_state["status"] = "loading"
+    start = time.perf_counter()
+    net = load_model()
+    if net is None:
+        model_state["status"] = "failed"
+        model_state["error"] = "Model not available. Please download the model file."
+        return None
+    model_state["load_time_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    model_state["error"] = None
+    model = net
+    return net
+
+
+def get_model():
+    """Return the loaded model, loading it on first use"""
     if model is None:
-        model = load_model()
+        with model_lock:
+            if model is None and publish_model() is not None:
+                # Lazy path (DISEASE_WARM_START=0): no warm-up pass, ready as soon as it's loaded
+                model_state["status"] = "ready"
         if model is None:
             raise HTTPException(status_code=503, detail="Model not available. Please download the model file.")
-    
+    return model
+
+
+def warm_start():
+    """Load the model and run warm-up forward passes at batch 1 and full batch size"""
+    with model_lock:
+        net = model if model is not None else publish_model()
+    if net is None:
+        return
+
+    model_state["status"] = "warming_up"
+    start = time.perf_counter()
     try:
-        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        image_tensor = transform(image).unsqueeze(0)
-        
         with torch.no_grad():
-            outputs = model(image_tensor)
-            probabilities = torch.nn.functional.softmax(outputs, dim=1)
-            confidence, predicted = torch.max(probabilities, 1)
-        
-        predicted_class_idx = predicted.item()
-        confidence_score = confidence.item() * 100
-        
-        disease_name = disease_classes[predicted_class_idx]
-        parts = disease_name.split('___')
-        plant_name = parts[0].replace('_', ' ')
-        disease = parts[1].replace('_', ' ') if len(parts) > 1 else 'Unknown'
-        
-        treatment = disease_treatments.get(disease_name, 'Consult with agricultural expert for specific treatment recommendations.')
-        
-        if 'healthy' in disease.lower():
-            severity = 'Healthy'
-            color = 'green'
-        elif confidence_score > 80:
-            severity = 'High Confidence Detection'
-            color = 'red' if 'healthy' not in disease.lower() else 'green'
-        elif confidence_score > 60:
-            severity = 'Moderate Confidence'
-            color = 'orange'
-        else:
-            severity = 'Low Confidence - Further inspection needed'
-            color = 'yellow'
-        
-        return {
-            'success': True,
-            'plant': plant_name,
-            'disease': disease,
-            'confidence': round(confidence_score, 2),
-            'severity': severity,
-            'color': color,
-            'treatment': treatment,
-            'raw_prediction': disease_name
-        }
-        
+            for batch_size in (1, BATCH_SIZE):
+                net(torch.zeros((batch_size, 3, image_pipeline.CROP, image_pipeline.CROP)))
     except Exception as e:
-        print(f"Prediction error: {e}")
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        print(f"✗ Warm-up failed: {e}")
+        model_state["status"] = "failed"
+        model_state["error"] = f"Warm-up failed: {e}"
+        return
+    model_state["warmup_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    model_state["status"] = "ready"
+    print(f"✓ Model warm in {model_state['warmup_ms']} ms")
+
+
+def prediction_error(e):
+    print(f"Prediction error: {e}")
+    return HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+def run_model(tensors, out=None):
+    """Stack preprocessed images (into `out` if given) and return class probabilities"""
+    net = get_model()
+    if out is not None:
+        batch = torch.stack(tensors, out=out[:len(tensors)])
+    else:
+        batch = torch.stack(tensors)
+
+    with torch.no_grad():
+        outputs = net(batch)
+        return torch.nn.functional.softmax(outputs, dim=1)
+
+
+def predict_disease_batch(images):
+    """
+    Predict diseases for a list of image bytes with one forward pass.
+    Returns one result dict per image, or an HTTPException for images that failed.
+    """
+    get_model()
+
+    results = [None] * len(images)
+    tensors = []
+    positions = []
+    for i, image_bytes in enumerate(images):
+        try:
+            tensors.append(image_pipeline.preprocess(image_bytes))
+            positions.append(i)
+        except Exception as e:
+            results[i] = prediction_error(e)
+
+    if tensors:
+        try:
+            probabilities = run_model(tensors)
+            for row, i in enumerate(positions):
+                results[i] = format_prediction(probabilities[row])
+        except Exception as e:
+            error = prediction_error(e)
+            for i in positions:
+                results[i] = error
+
+    return results
+
+
+def predict_disease(image_bytes):
+    """Predict disease from image bytes"""
+    result = predict_disease_batch([image_bytes])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+BATCH_SIZE = int(os.environ.get("DISEASE_BATCH_SIZE", 16))
+BATCH_WAIT_MS = float(os.environ.get("DISEASE_BATCH_WAIT_MS", 5))
+
+# Reused input buffers: per-image tensors written by preprocessing and
+# one batch tensor owned by the batcher thread
+input_pool = image_pipeline.TensorPool(BATCH_SIZE * 2)
+batch_buffer = torch.empty((BATCH_SIZE, 3, image_pipeline.CROP, image_pipeline.CROP), dtype=torch.float32)
+if image_pipeline.PIN_MEMORY:
+    batch_buffer = batch_buffer.pin_memory()
+
+
+def predict_tensor_batch(tensors):
+    """Batcher worker: one forward pass over already preprocessed images"""
+    try:
+        probabilities = run_model(tensors, out=batch_buffer)
+        return [format_prediction(row) for row in probabilities]
+    except HTTPException:
+        raise
+    except Exception as e:
+        error = prediction_error(e)
+        return [error] * len(tensors)
+    finally:
+        for tensor in tensors:
+            input_pool.release(tensor)
+
+
+def preprocess_image(image_bytes, with_phash=False):
+    """Pool worker: decode and normalize into a reusable input tensor, optionally with its perceptual hash"""
+    tensor = input_pool.acquire()
+    try:
+        image = image_pipeline.decode(image_bytes)
+        phash = f"dhash-{image_pipeline.dhash(image)}" if with_phash else None
+        return image_pipeline.to_tensor(image, out=tensor), phash
+    except Exception as e:
+        input_pool.release(tensor)
+        raise prediction_error(e)
+
+
+def content_hash(image_bytes):
+    return f"sha256-{hashlib.sha256(image_bytes).hexdigest()}"
+
+
+# Re-uploaded photos are answered from cache without decoding or inference
+result_cache = ResultCache(
+    max_size=int(os.environ.get("DISEASE_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("DISEASE_CACHE_TTL", 3600)),
+    disk_dir=os.environ.get("DISEASE_CACHE_DIR") or None,
+)
+CACHE_PHASH = os.environ.get("DISEASE_CACHE_PHASH", "0") == "1"
+
+
+# Concurrent /detect/ calls are grouped into one batched forward pass off the event loop
+batcher = MicroBatcher(
+    predict_tensor_batch,
+    max_batch_size=BATCH_SIZE,
+    max_wait_ms=BATCH_WAIT_MS,
+    name="disease-batcher",
+    discard=input_pool.release,
+)
+
+
+# Let enough requests through to fill a batch plus the next one waiting behind it
+executor.configure("detect", max_concurrent=batcher.max_batch_size * 2)
+executor.configure("preprocess", max_queue=batcher.max_batch_size * 4)
+
+
+async def cache_get(key):
+    """Look up a result; the disk tier is read in the worker pool, not on the event loop"""
+    if result_cache.blocking:
+        return await executor.run("cache", result_cache.get, key)
+    return result_cache.get(key)
+
+
+async def cache_set(key, value):
+    if result_cache.blocking:
+        await executor.run("cache", result_cache.set, key, value)
+    else:
+        result_cache.set(key, value)
+
+
+async def predict_disease_async(image_bytes):
+    """
+    Decode in the shared worker pool, then queue the tensor on the micro-batcher.
+    Decoding of new requests overlaps with inference of the current batch.
+    Results are cached by content hash (and perceptual hash if DISEASE_CACHE_PHASH=1).
+    """
+    if not result_cache.enabled:
+        tensor, _ = await executor.run("preprocess", preprocess_image, image_bytes)
+        return await batcher.submit(tensor)
+
+    content_key = await executor.run("preprocess", content_hash, image_bytes)
+    cached = await cache_get(content_key)
+    if cached is not None:
+        return cached
+
+    tensor, phash_key = await executor.run("preprocess", preprocess_image, image_bytes, CACHE_PHASH)
+    # The batcher owns the tensor once submitted; until then it goes back to the pool here
+    submitted = False
+    try:
+        if phash_key is not None:
+            cached = await cache_get(phash_key)
+            if cached is not None:
+                await cache_set(content_key, cached)
+                return cached
+        submitted = True
+        result = await batcher.submit(tensor)
+    finally:
+        if not submitted:
+            input_pool.release(tensor)
+    await cache_set(content_key, result)
+    if phash_key is not None:
+        await cache_set(phash_key, result)
+    return result
 
 
 @app.get("/")
@@ -256,6 +503,22 @@ async def root():
     }
 
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up; reports where the model is in its lifecycle"""
+    return {"status": "ok", "model": model_state}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 only once the model is loaded and warmed up"""
+    ready = model_state["status"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "model": model_state},
+    )
+
+
 @app.post("/detect/")
 async def detect_disease(file: UploadFile = File(...)):
     """Detect plant disease from uploaded image file"""
@@ -264,7 +527,8 @@ async def detect_disease(file: UploadFile = File(...)):
     
     try:
         image_bytes = await file.read()
-        result = predict_disease(image_bytes)
+        async with executor.limit("detect"):
+            result = await predict_disease_async(image_bytes)
         return result
     except HTTPException:
         raise
@@ -287,13 +551,39 @@ async def detect_disease_base64(data: ImageBase64):
             image_data = image_data.split(',')[1]
         
         image_bytes = base64.b64decode(image_data)
-        result = predict_disease(image_bytes)
+        async with executor.limit("detect"):
+            result = await predict_disease_async(image_bytes)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Base64 detection error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/batching/")
+async def batching_stats():
+    """Micro-batching counters for sizing DISEASE_BATCH_SIZE and DISEASE_BATCH_WAIT_MS"""
+    return batcher.stats()
+
+
+@app.get("/executor/")
+async def executor_stats():
+    """Per-endpoint concurrency, queue depth and rejection counts"""
+    return executor.stats()
+
+
+@app.get("/metrics/")
+async def metrics():
+    """Result cache hit/miss counters alongside batching and executor stats"""
+    return {
+        "cache": result_cache.stats(),
+        "batching": batcher.stats(),
+        "executor": executor.stats(),
+        "model": model_state,
+    }
+
+
 @app.get("/classes/")
 async def get_classes():
     """Get list of all detectable diseases"""
@@ -311,6 +601,5 @@ if __name__ == "__main__":
     print("Server will run on: http://localhost:8002")
     print("API docs available at: http://localhost:8002/docs")
     print("=" * 60)
-    load_model()
     uvicorn.run(app, host="0.0.0.0", port=8002, reload=True)
 
@@ -0,0 +1,209 @@
+"""
+Export PlantDiseaseModel for CPU serving
+Fuses Conv+ReLU, statically quantizes the conv stack to int8, dynamically quantizes the
+dense layers, saves a TorchScript artifact and writes an accuracy vs latency report
+Run with: python disease_export.py --calibration-dir <images> -o plant_disease_model_int8.pt
+Serve with: DISEASE_MODEL_PATH=plant_disease_model_int8.pt python start_disease_server.py
+"""
+from torch.ao.quantization import DeQuantStub, QuantStub
+from PIL import Image
+import torch.ao.quantization as quantization
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+import torch
+
+
+class QuantizablePlantDiseaseModel(torch.nn.Module):
+    """PlantDiseaseModel with quant/dequant stubs around the conv stack"""
+    def __init__(self, model):
+        super().__init__()
+        self.quant = QuantStub()
+        self.conv_layers = copy.deepcopy(model.conv_layers)
+        self.dequant = DeQuantStub()
+        self.dense_layers = copy.deepcopy(model.dense_layers)
+
+    def forward(self, x):
+        x = self.quant(x)
+        x = self.conv_layers(x)
+        x = self.dequant(x)
+        x = x.reshape(x.size(0), -1)
+        x = self.dense_layers(x)
+        return x
+
+
+def conv_relu_pairs(sequential):
+    """Names of adjacent Conv2d -> ReLU modules that can be fused"""
+    modules = list(sequential.named_children())
+    return [
+        [name, next_name]
+        for (name, module), (next_name, next_module) in zip(modules, modules[1:])
+        if isinstance(module, torch.nn.Conv2d) and isinstance(next_module, torch.nn.ReLU)
+    ]
+
+
+def quantize(model, calibration_batches):
+    """
+    Static int8 for the conv stack, dynamic int8 for the Linear layers.
+    BatchNorm follows ReLU in every block, so it cannot be folded into the conv weights;
+    it runs as a quantized BatchNorm2d instead.
+    """
+    engine = torch.backends.quantized.engine
+    qmodel = QuantizablePlantDiseaseModel(model).eval()
+    quantization.fuse_modules(qmodel.conv_layers, conv_relu_pairs(qmodel.conv_layers), inplace=True)
+
+    qmodel.qconfig = quantization.get_default_qconfig(engine)
+    qmodel.dense_layers.qconfig = None
+    quantization.prepare(qmodel, inplace=True)
+
+    with torch.no_grad():
+        for batch in calibration_batches:
+            qmodel(batch)
+
+    quantization.convert(qmodel, inplace=True)
+    return quantization.quantize_dynamic(qmodel, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def to_torchscript(model, example):
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example)
+    return torch.jit.freeze(scripted.eval())
+
+
+def load_images(directory, transform, limit):
+    """Preprocessed images and, for PlantVillage-style class folders, their labels"""
+    from disease_api import disease_classes
+    from disease_scan import list_images
+
+    tensors = []
+    labels = []
+    for path in list_images(directory)[:limit]:
+        try:
+            with open(path, 'rb') as file:
+                tensors.append(transform(Image.open(file).convert('RGB')))
+        except Exception as e:
+            print(f"⚠ Skipping {path}: {e}")
+            continue
+        folder = os.path.basename(os.path.dirname(path))
+        labels.append(disease_classes.index(folder) if folder in disease_classes else -1)
+    return tensors, labels
+
+
+def batches(tensors, batch_size):
+    for i in range(0, len(tensors), batch_size):
+        yield torch.stack(tensors[i:i + batch_size])
+
+
+def measure_latency(model, batch_size, runs):
+    example = torch.randn(batch_size, 3, 224, 224)
+    timings = []
+    with torch.no_grad():
+        for _ in range(2):
+            model(example)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(example)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "batch_size": batch_size,
+        "mean_ms": round(statistics.mean(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "per_image_ms": round(statistics.mean(timings) / batch_size, 2),
+    }
+
+
+def predictions(model, tensors, batch_size):
+    with torch.no_grad():
+        return torch.cat([torch.softmax(model(batch), dim=1) for batch in batches(tensors, batch_size)])
+
+
+def compare(fp32_model, int8_model, tensors, labels, batch_size, runs):
+    """Accuracy (when labels are known), agreement with fp32 and latency for both models"""
+    report = {"images": len(tensors)}
+
+    if tensors:
+        fp32_probs = predictions(fp32_model, tensors, batch_size)
+        int8_probs = predictions(int8_model, tensors, batch_size)
+        fp32_top1 = fp32_probs.argmax(dim=1)
+        int8_top1 = int8_probs.argmax(dim=1)
+        report["top1_agreement"] = round((fp32_top1 == int8_top1).float().mean().item(), 4)
+        report["max_probability_delta"] = round((fp32_probs - int8_probs).abs().max().item(), 4)
+
+        label_tensor = torch.tensor(labels)
+        known = label_tensor >= 0
+        if known.any():
+            report["labelled_images"] = int(known.sum())
+            report["fp32_accuracy"] = round((fp32_top1[known] == label_tensor[known]).float().mean().item(), 4)
+            report["int8_accuracy"] = round((int8_top1[known] == label_tensor[known]).float().mean().item(), 4)
+
+    report["latency"] = {
+        "fp32": [measure_latency(fp32_model, size, runs) for size in (1, batch_size)],
+        "int8": [measure_latency(int8_model, size, runs) for size in (1, batch_size)],
+    }
+    return report
+
+
+def file_size_mb(path):
+    return round(os.path.getsize(path) / (1024 * 1024), 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize and TorchScript-export the plant disease model")
+    parser.add_argument('--model', help="Source checkpoint (defaults to the one disease_api loads)")
+    parser.add_argument('-o', '--output', default='plant_disease_model_int8.pt')
+    parser.add_argument('--calibration-dir', help="Representative leaf images for static quantization")
+    parser.add_argument('--calibration-images', type=int, default=256)
+    parser.add_argument('--eval-dir', help="Images for the report; class-named folders enable accuracy")
+    parser.add_argument('--eval-images', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--runs', type=int, default=10, help="Timed runs per latency measurement")
+    parser.add_argument('--fp32', action='store_true', help="Export a frozen fp32 TorchScript model without quantizing")
+    args = parser.parse_args(argv)
+
+    import disease_api
+
+    model = disease_api.load_model(args.model)
+    if model is None:
+        return 1
+    model.eval()
+
+    example = torch.randn(1, 3, 224, 224)
+
+    if args.fp32:
+        exported = to_torchscript(model, example)
+    else:
+        if args.calibration_dir:
+            calibration, _ = load_images(args.calibration_dir, disease_api.transform, args.calibration_images)
+        else:
+            calibration = []
+        if not calibration:
+            print("⚠ No calibration images; using random inputs. Activation ranges (and accuracy) will suffer.")
+            calibration = list(torch.randn(args.batch_size, 3, 224, 224))
+        print(f"Calibrating on {len(calibration)} images...")
+        exported = to_torchscript(quantize(model, batches(calibration, args.batch_size)), example)
+
+    torch.jit.save(exported, args.output)
+    print(f"✓ Saved TorchScript model to {args.output} ({file_size_mb(args.output)} MB)")
+
+    eval_dir = args.eval_dir or args.calibration_dir
+    tensors, labels = load_images(eval_dir, disease_api.transform, args.eval_images) if eval_dir else ([], [])
+    report = compare(model, exported, tensors, labels, args.batch_size, args.runs)
+    report["artifact"] = args.output
+    report["artifact_mb"] = file_size_mb(args.output)
+    report["mode"] = "fp32" if args.fp32 else "int8"
+
+    report_path = os.path.splitext(args.output)[0] + "_report.json"
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"✓ Report written to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
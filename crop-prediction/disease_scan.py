@@ -0,0 +1,189 @@
+"""
+Bulk offline plant disease scan
+Scores every image in a directory (or listed in a manifest) and streams results to CSV or JSONL
+Run with: python disease_scan.py <images_dir> -o results.csv
+"""
+from torch.utils.data import DataLoader, Dataset
+from PIL import Image
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import torch
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff'}
+FIELDS = ['path', 'plant', 'disease', 'confidence', 'severity', 'raw_prediction', 'error']
+
+
+class ImageFileDataset(Dataset):
+    """Decodes images with the API's transform; failures are reported, not raised"""
+    def __init__(self, paths, transform):
+        self.paths = paths
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        try:
+            with open(self.paths[index], 'rb') as file:
+                image = Image.open(file).convert('RGB')
+            return self.transform(image), index, ''
+        except Exception as e:
+            return torch.zeros((3, 224, 224)), index, str(e) or type(e).__name__
+
+
+def list_images(directory):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def read_manifest(manifest):
+    """One path per line, or a CSV with a 'path' column; relative paths are resolved against the manifest"""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, newline='') as file:
+        if manifest.lower().endswith('.csv'):
+            paths = [row['path'] for row in csv.DictReader(file)]
+        else:
+            paths = [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    return [path if os.path.isabs(path) else os.path.join(base, path) for path in paths]
+
+
+def output_format(output, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if output.lower().endswith(('.jsonl', '.json')) else 'csv'
+
+
+def completed_paths(output, fmt):
+    """Paths already scored in a previous run of the same output file"""
+    if not os.path.exists(output):
+        return set()
+    done = set()
+    with open(output, newline='') as file:
+        if fmt == 'jsonl':
+            for line in file:
+                try:
+                    done.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    continue  # partially written last line
+        else:
+            done = {row['path'] for row in csv.DictReader(file) if row.get('path')}
+    return done
+
+
+class ResultWriter:
+    def __init__(self, output, fmt):
+        self.fmt = fmt
+        is_new = not os.path.exists(output) or os.path.getsize(output) == 0
+        self.file = open(output, 'a', newline='')
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS, extrasaction='ignore')
+            if is_new:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == 'jsonl':
+            self.file.write(json.dumps(row) + '\n')
+        else:
+            self.writer.writerow(row)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def scan(paths, output, fmt=None, batch_size=64, workers=4, resume=True, log_every=10):
+    """Score `paths` in batches and append one result row per image to `output`"""
+    import disease_api
+
+    fmt = output_format(output, fmt)
+    if resume:
+        done = completed_paths(output, fmt)
+        paths = [path for path in paths if path not in done]
+        if done:
+            print(f"✓ Resuming: {len(done)} images already in {output}")
+    elif os.path.exists(output):
+        os.remove(output)
+
+    if not paths:
+        print("✓ Nothing to do")
+        return 0
+
+    model = disease_api.load_model()
+    if model is None:
+        print("✗ Model not available")
+        return 1
+
+    loader = DataLoader(
+        ImageFileDataset(paths, disease_api.transform),
+        batch_size=batch_size,
+        num_workers=workers,
+        persistent_workers=workers > 0,
+    )
+
+    writer = ResultWriter(output, fmt)
+    scored = 0
+    failed = 0
+    start = time.perf_counter()
+    try:
+        for batch_number, (images, indices, errors) in enumerate(loader, 1):
+            with torch.no_grad():
+                probabilities = torch.nn.functional.softmax(model(images), dim=1)
+
+            for row, index, error in zip(probabilities, indices.tolist(), errors):
+                if error:
+                    failed += 1
+                    writer.write({'path': paths[index], 'error': error})
+                else:
+                    result = disease_api.format_prediction(row)
+                    writer.write({'path': paths[index], **result, 'error': ''})
+            writer.flush()
+            scored += len(indices)
+
+            if batch_number % log_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {scored}/{len(paths)} images, {scored / elapsed:.1f} img/s")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ Scored {scored} images ({failed} unreadable) in {elapsed:.1f}s "
+          f"- {scored / elapsed:.1f} img/s -> {output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a directory of leaf images with the plant disease model")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('directory', nargs='?', help="Directory to walk for images")
+    source.add_argument('--manifest', help="Text file with one image path per line, or CSV with a 'path' column")
+    parser.add_argument('-o', '--output', default='disease_scan.csv', help="Output .csv or .jsonl file")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Override the format implied by the output name")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help="DataLoader decode processes")
+    parser.add_argument('--threads', type=int, help="torch intra-op threads for inference")
+    parser.add_argument('--no-resume', action='store_true', help="Start over instead of skipping images already in the output")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    paths = read_manifest(args.manifest) if args.manifest else list_images(args.directory)
+    print(f"Found {len(paths)} images")
+
+    return scan(paths, args.output, args.format, args.batch_size, args.workers, not args.no_resume)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,30 @@
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from utils import pred_crop, pred_rainfall, pred_temp_hum
+import asyncio
+import io
+import numpy as np
+import pandas as pd
+from utils import climate_estimate, executor, model_registry, name_resolver, pred_crop, pred_rainfall, pred_temp_hum, rainfall_history, weather_client
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the crop model and rainfall table once so /predict/ never touches the disk
+    model_registry.load_registry()
+    pred_rainfall.get_store()
+    rainfall_history.get_history()
+    pred_temp_hum.get_field()
+    if climate_estimate.ENABLED:
+        climate_estimate.get_estimate()
+    name_resolver.get_resolver()
+    yield
+    await weather_client.get_client().close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +40,14 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.get("/model-info/")
+async def model_info():
+    """Report load time and memory use of the crop model"""
+    if model_registry.registry is None:
+        return {"model_status": "not_loaded"}
+    return {"model_status": "loaded", **model_registry.registry.stats()}
+
+
 class Inputs(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True)
     
@@ -43,13 +72,202 @@ async def predict(inputs: Inputs):
     ph = inputs.ph
 
     try:
-        rainfall = pred_rainfall.get_rainfall(state, district, month)
+        state, district, score = canonical_place(state, district)
+        temperature, humidity = await pred_temp_hum.get_temp_hum_async(district, state, month)
+        prediction = await executor.run(
+            "predict", run_prediction, nitrogen, phosphorous, potassium, ph, state, district, month,
+            temperature, humidity)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"result": prediction[0], "resolved_state": state, "resolved_district": district, "score": score}
+
+
+def canonical_place(state, district):
+    """
+    Rainfall-file spelling of a (state, district) and the match score, or the input unchanged
+    with a score of None if it can't be resolved
+    """
+    match = name_resolver.get_resolver().resolve(state, district, source='rainfall')
+    if match is None:
+        return state, district, None
+    return match["state"], match["district"], match["score"]
+
+
+def run_prediction(nitrogen, phosphorous, potassium, ph, state, district, month, temperature, humidity):
+    """Blocking part of /predict/, run in the shared executor"""
+    rainfall = pred_rainfall.get_rainfall(state, district, month)
+
+    return pred_crop.predict_crop(
+        nitrogen, phosphorous, potassium, temperature, humidity, ph, rainfall)
+
+
+@app.get("/rainfall/history/")
+async def rainfall_history_summary(
+    period: str = "ANNUAL",
+    subdivision: Optional[str] = None,
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    window: int = Query(10, ge=1, le=115),
+    year: Optional[int] = None,
+    value: Optional[float] = None,
+):
+    """Long-term normal, percentiles, rolling mean and drought odds for a subdivision or district"""
+    try:
+        history = rainfall_history.get_history()
+        if subdivision is None:
+            if not state or not district:
+                raise Exception("Pass either subdivision, or state and district")
+            subdivision = history.subdivision_for(state, district)
+        return history.summary(subdivision, period, window=window, year=year, value=value)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/resolve/")
+async def resolve_place(state: str, district: Optional[str] = None, source: str = "rainfall"):
+    """Canonical state / district spelling for a possibly misspelled name, with a similarity score"""
+    resolver = name_resolver.get_resolver()
+    if source not in resolver.sources():
+        raise HTTPException(status_code=400, detail=f"Unknown source '{source}'. Use one of: {', '.join(resolver.sources())}")
+    match = resolver.resolve(state, district, source=source)
+    if match is None:
+        raise HTTPException(status_code=404, detail=f"No match for state '{state}'" + (f" and district '{district}'" if district else ""))
+    return match
+
+
+@app.get("/weather/")
+async def weather_stats():
+    """Live weather cache, request coalescing and circuit breaker state"""
+    return weather_client.get_client().stats()
+
+
+@app.get("/executor/")
+async def executor_stats():
+    """Worker pool queue depth and per-endpoint rejection counts"""
+    return executor.stats()
+
+
+INPUT_COLUMNS = ['nitrogen', 'phosphorous', 'potassium', 'ph', 'state', 'district', 'month']
+MAX_BATCH_ROWS = 10000
 
-        temperature, humidity = pred_temp_hum.get_temp_hum(district)
 
-        prediction = pred_crop.predict_crop(
-            nitrogen, phosphorous, potassium, temperature, humidity, ph, rainfall)
+def predict_frame(frame, top_k=0):
+    """
+    Run the full /predict/ pipeline over a DataFrame of Inputs rows at once. Weather is read
+    from the weather client's cache without network calls; prefetch_weather fills it first.
+    """
+    count = len(frame)
+    if count == 0:
+        return {"count": 0, "results": []}
+    if count > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {count} rows (max {MAX_BATCH_ROWS})")
+
+    states = frame['state'].astype(str).str.strip()
+    districts = frame['district'].astype(str).str.strip()
+    months = frame['month'].astype(str).str.strip()
+
+    # Resolve misspelled names once per distinct pair; errors still echo the input
+    canonical = {pair: canonical_place(*pair) for pair in set(zip(states, districts))}
+    canonical_states = [canonical[pair][0] for pair in zip(states, districts)]
+    canonical_districts = [canonical[pair][1] for pair in zip(states, districts)]
+
+    rainfall = pred_rainfall.get_rainfall_batch(canonical_states, canonical_districts, months)
+
+    # One climate lookup per distinct district and month instead of per row
+    places = list(zip(canonical_states, canonical_districts, months))
+    climate = {place: pred_temp_hum.get_temp_hum(place[1], place[0], place[2]) for place in set(places)}
+    temp_hum = np.array([climate[place] for place in places], dtype=np.float64).reshape(-1, 2)
+
+    features = np.column_stack([
+        frame['nitrogen'].to_numpy(dtype=np.float64),
+        frame['phosphorous'].to_numpy(dtype=np.float64),
+        frame['potassium'].to_numpy(dtype=np.float64),
+        temp_hum[:, 0],
+        temp_hum[:, 1],
+        frame['ph'].to_numpy(dtype=np.float64),
+        rainfall,
+    ])
+
+    valid = ~np.isnan(features).any(axis=1)
+    results = [{"index": int(i), "error": row_error(states.iloc[i], districts.iloc[i], months.iloc[i], canonical)}
+               for i in np.flatnonzero(~valid)]
+
+    valid_idx = np.flatnonzero(valid)
+    if len(valid_idx) > 0:
+        labels, top = pred_crop.predict_crop_batch(features[valid_idx], top_k)
+        for j, i in enumerate(valid_idx):
+            row = {"index": int(i), "result": str(labels[j])}
+            if top is not None:
+                row["top_k"] = top[j]
+            results.append(row)
+
+    results.sort(key=lambda row: row["index"])
+    return {"count": count, "results": results}
+
+
+def row_error(state, district, month, canonical):
+    """Why a batch row could not be scored: the resolver's failure, or an unknown month"""
+    if canonical[(state, district)][2] is None:
+        return name_resolver.get_resolver().explain(state, district, source='rainfall')
+    if pred_rainfall.get_store().column_index.get(pred_rainfall.normalize_key(month)) is None:
+        return f"Unknown month '{month}'. Use one of: {', '.join(pred_rainfall.MONTH_COLUMNS)}"
+    return "Missing or non-numeric nitrogen, phosphorous, potassium or ph"
+
+
+def batch_districts(frame):
+    """Distinct resolved districts of a batch, as /predict/ would look them up"""
+    pairs = set(zip(frame['state'].astype(str).str.strip(), frame['district'].astype(str).str.strip()))
+    return {canonical_place(*pair)[1] for pair in pairs}
+
+
+async def prefetch_weather(frame):
+    """
+    Fetch live weather for every district in a batch, as /predict/ does for one row, so that
+    predict_frame (which only reads the weather client's cache) scores each row like /predict/
+    """
+    client = weather_client.get_client()
+    if frame.empty or len(frame) > MAX_BATCH_ROWS or not client.enabled or climate_estimate.ENABLED:
+        return
+    districts = await executor.run("predict-batch", batch_districts, frame)
+    await asyncio.gather(*(client.get(district) for district in districts))
+
+
+@app.post("/predict/batch")
+async def predict_batch(inputs: List[Inputs], top_k: int = Query(0, ge=0, le=22)):
+    """Predict crops for a JSON array of Inputs rows; each row gets the same weather as /predict/"""
+    frame = pd.DataFrame([row.model_dump() for row in inputs], columns=INPUT_COLUMNS)
+    await prefetch_weather(frame)
+    return await executor.run("predict-batch", predict_frame, frame, top_k)
+
+
+@app.post("/predict/batch/csv")
+async def predict_batch_csv(file: UploadFile = File(...), top_k: int = Query(0, ge=0, le=22)):
+    """Predict crops for an uploaded CSV with the same columns as Inputs, with the same weather as /predict/"""
+    contents = await file.read()
+    frame = await executor.run("predict-batch", read_csv, contents)
+    await prefetch_weather(frame)
+    return await executor.run("predict-batch", predict_frame, frame, top_k)
+
+
+def read_csv(contents):
+    """Parse an uploaded CSV into the Inputs columns"""
+    try:
+        frame = pd.read_csv(io.BytesIO(contents))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {e}")
+
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    missing = [column for column in INPUT_COLUMNS if column not in frame.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+
+    try:
+        for column in ['nitrogen', 'phosphorous', 'potassium', 'ph']:
+            frame[column] = pd.to_numeric(frame[column])
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return {"result": prediction[0]}
+    return frame[INPUT_COLUMNS]
@@ -15,4 +15,4 @@ class Net_64_128_64(nn.Module):
         x = F.selu(self.fc2(x))
         x = F.selu(self.fc3(x))
         x = self.fc4(x)
-        return F.softmax(x)
+        return F.softmax(x, dim=-1)
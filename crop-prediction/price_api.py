@@ -0,0 +1,115 @@
+"""
+Market Price API
+Latest mandi prices, price ranges and nearest markets from data/price, with live appends
+"""
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ConfigDict
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from typing import List, Optional
+import os
+from utils import executor, market_prices, spatial_index
+
+
+# Opt-in: write appended arrivals to market_prices.APPENDS_CSV (never data/price) so a restart keeps them
+PERSIST_APPENDS = os.environ.get("PRICE_PERSIST_APPENDS", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    table = market_prices.get_table()
+    print(f"✓ Price table loaded ({len(table)} arrivals, {len(table.commodities())} commodities)")
+    yield
+
+
+app = FastAPI(title="Market Price API", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+class PriceRow(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    state: str
+    district: str
+    market: str
+    commodity: str
+    variety: str
+    arrival_date: str  # dd/mm/yyyy or yyyy-mm-dd
+    min_price: float
+    max_price: float
+    modal_price: float
+
+
+def run_query(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Market Price API",
+        "endpoints": ["/prices/latest", "/prices/range", "/prices/nearest", "/prices/append", "/commodities/"],
+    }
+
+
+@app.get("/commodities/")
+async def commodities():
+    return {"commodities": market_prices.get_table().commodities()}
+
+
+@app.get("/prices/latest")
+async def latest_prices(commodity: str, state: Optional[str] = None, district: Optional[str] = None,
+                        limit: int = Query(50, ge=1, le=1000)):
+    """Latest min / max / modal price per market for a commodity, optionally within a state or district"""
+    rows = run_query(market_prices.get_table().latest, commodity, state, district)
+    return {"count": len(rows), "results": rows[:limit]}
+
+
+@app.get("/prices/range")
+async def price_range(commodity: str, state: Optional[str] = None, district: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None):
+    """Price spread for a commodity across matching arrivals"""
+    return run_query(market_prices.get_table().price_range, commodity, state, district, since, until)
+
+
+@app.get("/prices/nearest")
+async def nearest_markets(commodity: str, lat: Optional[float] = None, lon: Optional[float] = None,
+                          state: Optional[str] = None, district: Optional[str] = None,
+                          k: int = Query(5, ge=1, le=100)):
+    """Closest markets selling a commodity, from a coordinate or a district's centroid"""
+    if lat is None or lon is None:
+        if not district:
+            raise HTTPException(status_code=400, detail="Pass lat and lon, or a district")
+        point = spatial_index.get_locator().coordinates(district, state)
+        if point is None:
+            raise HTTPException(status_code=404, detail=f"No coordinates for district '{district}'")
+        lat, lon = point
+    rows = run_query(market_prices.get_table().nearest_markets, commodity, lat, lon, k)
+    return {"origin": {"lat": lat, "lon": lon}, "count": len(rows), "results": rows}
+
+
+@app.post("/prices/append")
+async def append_prices(rows: List[PriceRow]):
+    """Add new arrivals without reloading the table"""
+    if not rows:
+        return {"added": 0, "rows": len(market_prices.get_table())}
+    records = [row.model_dump() for row in rows]
+    added = await executor.run("price-append", run_query, market_prices.get_table().append, records)
+    if PERSIST_APPENDS and added:
+        await executor.run("price-append", market_prices.append_csv, records)
+    return {"added": added, "rows": len(market_prices.get_table())}
+
+
+@app.get("/stats/")
+async def stats():
+    return market_prices.get_table().stats()
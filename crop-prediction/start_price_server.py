@@ -0,0 +1,16 @@
+"""
+Start the Market Price API server
+Run with: python start_price_server.py
+"""
+import uvicorn
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Starting Market Price API Server")
+    print("=" * 60)
+    print("Server will run on: http://localhost:8003")
+    print("API docs available at: http://localhost:8003/docs")
+    print("Press Ctrl+C to stop")
+    print("=" * 60)
+    
+    uvicorn.run("price_api:app", host="0.0.0.0", port=8003, reload=True)
@@ -0,0 +1,16 @@
+"""
+Start the Crop Yield Classification API server
+Run with: python start_yield_model_server.py
+"""
+import uvicorn
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Starting Crop Yield Classification API Server")
+    print("=" * 60)
+    print("Server will run on: http://localhost:8004")
+    print("API docs available at: http://localhost:8004/docs")
+    print("Press Ctrl+C to stop")
+    print("=" * 60)
+    
+    uvicorn.run("yield_model_api:app", host="0.0.0.0", port=8004, reload=True)
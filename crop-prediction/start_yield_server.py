@@ -3,6 +3,7 @@ Start the Crop Yield Prediction API server
 Run with: python start_yield_server.py
 """
 import uvicorn
+from utils import crop_stats
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -13,5 +14,11 @@ if __name__ == "__main__":
     print("Press Ctrl+C to stop")
     print("=" * 60)
     
+    # Build the crop statistics cache once; workers (and reloads) then just memory-map it
+    try:
+        crop_stats.load_or_build()
+    except Exception as e:
+        print(f"Warning: Could not build crop statistics cache: {e}")
+    
     uvicorn.run("yield_api:app", host="0.0.0.0", port=8001, reload=True)
 
@@ -0,0 +1,103 @@
+"""
+Test script for the live weather client: caching, 404 handling and the circuit breaker
+Runs against an in-process stub transport, so no API key or network is needed.
+Run with: python test_weather_client.py
+"""
+import asyncio
+import time
+import httpx
+from utils.weather_client import CircuitBreaker, WeatherClient
+
+
+class StubUpstream:
+    """Answers like OpenWeatherMap: 200 for known cities, 404 for others, 500 while `down`"""
+    def __init__(self, known=("LUDHIANA", "KARNAL")):
+        self.known = set(known)
+        self.down = False
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        if self.down:
+            return httpx.Response(500)
+        city = request.url.params["q"].split(",")[0]
+        if city not in self.known:
+            return httpx.Response(404, json={"message": "city not found"})
+        return httpx.Response(200, json={"main": {"humidity": 40, "temp_min": 300.15, "temp_max": 310.15}})
+
+
+def make_client(upstream, **kwargs):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    return WeatherClient(api_key="k" * 20, base_url="http://stub/weather", breaker=breaker,
+                         transport=httpx.MockTransport(upstream), **kwargs)
+
+
+async def test_cache_and_coalescing():
+    print("\n1. Cached values and concurrent requests share one upstream call...")
+    upstream = StubUpstream()
+    client = make_client(upstream)
+    values = await asyncio.gather(*(client.get("Ludhiana") for _ in range(10)))
+    assert all(value == (32.0, 40) for value in values), values
+    assert await client.get(" ludhiana ") == (32.0, 40)
+    assert upstream.calls == 1, upstream.calls
+    await client.close()
+    print("✓ 11 lookups, 1 upstream call")
+
+
+async def test_not_found_is_cached():
+    print("\n2. An unknown district (404) is remembered and doesn't trip the breaker...")
+    upstream = StubUpstream()
+    client = make_client(upstream, not_found_ttl=0.2)
+    for _ in range(5):
+        assert await client.get("Atlantis") is None
+    assert upstream.calls == 1, upstream.calls
+    assert client.breaker.state == "closed"
+    time.sleep(0.25)
+    assert await client.get("Atlantis") is None
+    assert upstream.calls == 2, upstream.calls
+    await client.close()
+    print("✓ 404 cached until its TTL, breaker stays closed")
+
+
+async def test_breaker_opens_serves_stale_and_recovers():
+    print("\n3. Breaker opens on failures, serves stale values, and closes after a good trial...")
+    upstream = StubUpstream()
+    client = make_client(upstream, cache_ttl=0.05)
+    assert await client.get("Ludhiana") == (32.0, 40)
+    time.sleep(0.06)
+
+    upstream.down = True
+    assert await client.get("Ludhiana") == (32.0, 40)  # failure 1, stale value served
+    assert await client.get("Karnal") is None           # failure 2 opens the breaker
+    assert client.breaker.state == "open"
+    calls = upstream.calls
+    assert await client.get("Ludhiana") == (32.0, 40)   # short-circuited, stale value
+    assert upstream.calls == calls and client.short_circuited == 1
+
+    # Half-open: a failed trial reopens the breaker at once
+    time.sleep(0.25)
+    assert client.breaker.state == "half_open"
+    assert await client.get("Karnal") is None
+    assert client.breaker.state == "open"
+
+    # A successful trial closes it
+    time.sleep(0.25)
+    upstream.down = False
+    assert await client.get("Karnal") == (32.0, 40)
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+    await client.close()
+    print(f"✓ Breaker opened {client.breaker.times_opened} times and closed again")
+
+
+async def main():
+    print("=" * 60)
+    print("Testing Weather Client")
+    print("=" * 60)
+    await test_cache_and_coalescing()
+    await test_not_found_is_cached()
+    await test_breaker_opens_serves_stale_and_recovers()
+    print("\n✓ All weather client tests passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -103,6 +103,21 @@ def test_api():
     except Exception as e:
         print(f"Error: {e}")
     
+    # Test 5: Batch scoring (streamed as newline-delimited JSON)
+    print("\n5. Testing batch endpoint...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/predict-yield/batch",
+            json=[test_data_high, test_data_low, test_data_cotton],
+            headers={"Content-Type": "application/json"}
+        )
+        print(f"Status: {response.status_code}")
+        for line in response.text.splitlines():
+            row = json.loads(line)
+            print(f"✓ Row {row['index']}: {row.get('yieldCategory', row.get('error'))}")
+    except Exception as e:
+        print(f"Error: {e}")
+    
     print("\n" + "=" * 60)
     print("Testing complete!")
     print("=" * 60)
@@ -0,0 +1,208 @@
+"""
+Approximate district x month temperature and humidity, for answering /predict/ offline
+This is NOT measured climatology: no temperature or humidity observations ship in data/. Annual
+levels are REGION_DEFAULTS spread over the district centroids (utils.spatial_index), a fixed
+all-India temperature curve is scaled by latitude and humidity is shifted with each district's
+monthly rainfall normals. Off unless CLIMATE_ESTIMATES=1; then a month is answered from this
+table without any network call, otherwise live weather is used.
+Stored as a float32 .npy cache keyed by the source files' hashes and memory-mapped on load.
+Build the cache ahead of time with: python -m utils.climate_estimate
+"""
+from utils.pred_rainfall import MONTH_COLUMNS, RAINFALL_CSV, normalize_key
+from utils import npy_cache, pred_rainfall, spatial_index
+import argparse
+import numpy as np
+import os
+import time
+
+
+# Opt-in: estimates are made-up values, so live weather stays the default
+ENABLED = os.environ.get("CLIMATE_ESTIMATES", "0") == "1"
+
+CACHE_DIR = os.environ.get("CLIMATE_ESTIMATE_CACHE_DIR", "data/cache")
+CACHE_NAME = "climate_estimate"
+CACHE_VERSION = 1
+
+SOURCES = [RAINFALL_CSV, spatial_index.APPORTIONED_CSV, spatial_index.GEOCODED_CSV]
+
+MONTHS = MONTH_COLUMNS[:12]
+
+# Periods answered besides single months, as month positions (matches MONTH_COLUMNS)
+PERIOD_MONTHS = {
+    'ANNUAL': list(range(12)),
+    'Jan-Feb': [0, 1],
+    'Mar-May': [2, 3, 4],
+    'Jun-Sep': [5, 6, 7, 8],
+    'Oct-Dec': [9, 10, 11],
+}
+
+# Hand-set approximation of the all-India monthly temperature minus its annual mean (deg C): a
+# pre-monsoon peak in May and a cool Dec-Jan. Scaled per district by temperature_amplitude().
+TEMPERATURE_CYCLE = np.array([-7.0, -4.8, -0.8, 3.2, 5.5, 5.0, 3.2, 2.7, 2.3, 0.6, -3.2, -6.7])
+
+# Assumed humidity swing (percentage points) between the driest and wettest month
+HUMIDITY_SPAN = 30.0
+HUMIDITY_RANGE = (15.0, 98.0)
+
+# Latitude scaling of TEMPERATURE_CYCLE: (lat - offset) / scale, clipped to [low, high]
+AMPLITUDE_OFFSET, AMPLITUDE_SCALE = 8.0, 16.0
+AMPLITUDE_RANGE = (0.25, 1.4)
+
+TEMPERATURE, HUMIDITY = 0, 1
+
+
+def temperature_amplitude(lat):
+    """The seasonal swing is small near the equator and large in the north-west plains"""
+    return np.clip((np.asarray(lat) - AMPLITUDE_OFFSET) / AMPLITUDE_SCALE, *AMPLITUDE_RANGE)
+
+
+def monthly_climate(annual_temp, annual_humidity, lat, rainfall):
+    """
+    (N, 12, 2) monthly temperature and humidity from annual levels, latitudes and (N, 12)
+    monthly rainfall normals. Monthly means average back to the annual level before clipping.
+    """
+    annual_temp = np.asarray(annual_temp, dtype=np.float64)[:, None]
+    annual_humidity = np.asarray(annual_humidity, dtype=np.float64)[:, None]
+    temperature = annual_temp + temperature_amplitude(lat)[:, None] * TEMPERATURE_CYCLE
+
+    # Relative wetness of each month on a log scale, centred on the district's own mean
+    wetness = np.log1p(np.nan_to_num(np.asarray(rainfall, dtype=np.float64)))
+    spread = wetness.max(axis=1, keepdims=True) - wetness.min(axis=1, keepdims=True)
+    wetness = (wetness - wetness.mean(axis=1, keepdims=True)) / np.where(spread > 0, spread, 1)
+    humidity = np.clip(annual_humidity + HUMIDITY_SPAN * wetness, *HUMIDITY_RANGE)
+
+    return np.stack([temperature, humidity], axis=-1)
+
+
+def with_periods(monthly):
+    """Append ANNUAL and seasonal means so columns line up with MONTH_COLUMNS"""
+    periods = [monthly[:, months].mean(axis=1) for months in PERIOD_MONTHS.values()]
+    return np.concatenate([monthly, np.stack(periods, axis=1)], axis=1)
+
+
+class ClimateEstimate:
+    """(district x period x [temperature, humidity]) float32 table of approximate values"""
+    def __init__(self, states, districts, values):
+        self.states = list(states)
+        self.districts = list(districts)
+        # np.asarray keeps a read-only memmap as-is instead of copying it
+        self.values = np.asarray(values, dtype=np.float32)
+        self.column_index = {normalize_key(column): i for i, column in enumerate(MONTH_COLUMNS)}
+
+        self.row_index = {}
+        self.rows_by_district = {}
+        for i, key in enumerate(zip(self.states, self.districts)):
+            self.row_index.setdefault(key, i)
+            self.rows_by_district.setdefault(key[1], []).append(i)
+
+    def __len__(self):
+        return len(self.districts)
+
+    def find_row(self, district, state=None):
+        district_key = normalize_key(district)
+        if state:
+            row = self.row_index.get((normalize_key(state), district_key))
+            if row is not None:
+                return row
+        rows = self.rows_by_district.get(district_key)
+        return rows[0] if rows else None
+
+    def lookup(self, district, state=None, month='ANNUAL'):
+        """(temperature, humidity) for a district and month / season, or None"""
+        row = self.find_row(district, state)
+        column = self.column_index.get(normalize_key(month or 'ANNUAL'))
+        if row is None or column is None:
+            return None
+        temp, humidity = self.values[row, column].tolist()
+        return (temp, humidity)
+
+
+def build(field=None, store=None):
+    """Compute the table for every district with rainfall normals"""
+    from utils import pred_temp_hum
+
+    store = store or pred_rainfall.get_store()
+    field = field or pred_temp_hum.get_field()
+    locator = field.locator
+
+    count = len(store.values)
+    states = [None] * count
+    districts = [None] * count
+    for (state, district), row in store.row_index.items():
+        states[row], districts[row] = state, district
+
+    # Districts the locator can't place sit at their state's centroid
+    located = [locator.find_row(district, state) for state, district in zip(states, districts)]
+    centroids = {}
+    for row in range(len(locator)):
+        centroids.setdefault(locator.states[row], []).append((locator.lat[row], locator.lon[row]))
+    centroids = {state: np.mean(points, axis=0) for state, points in centroids.items()}
+    default_point = np.array([locator.lat.mean(), locator.lon.mean()])
+
+    points = np.array([
+        (locator.lat[row], locator.lon[row]) if row is not None
+        else centroids.get(spatial_index.normalize_state(state), default_point)
+        for row, state in zip(located, states)
+    ])
+    annual, _ = field.interpolator.query(points[:, 0], points[:, 1])
+
+    monthly = monthly_climate(annual[:, 0], annual[:, 1], points[:, 0], store.values[:, :12])
+    return ClimateEstimate(states, districts, with_periods(monthly))
+
+
+def sources_sha256(paths=SOURCES):
+    """Hash of the input files plus the known cities and every constant the table is built from"""
+    from utils.pred_temp_hum import NEIGHBOURS, REGION_DEFAULTS
+
+    return npy_cache.sources_sha256(
+        paths,
+        repr(sorted(REGION_DEFAULTS.items())).encode(),
+        TEMPERATURE_CYCLE.tobytes(),
+        repr((AMPLITUDE_OFFSET, AMPLITUDE_SCALE, AMPLITUDE_RANGE)).encode(),
+        repr((HUMIDITY_SPAN, HUMIDITY_RANGE)).encode(),
+        repr((NEIGHBOURS, sorted(PERIOD_MONTHS.items()))).encode(),
+    )
+
+
+def to_cache(table):
+    return table.values, {
+        "columns": MONTH_COLUMNS,
+        "rows": len(table),
+        "states": table.states,
+        "districts": table.districts,
+    }
+
+
+def from_cache(values, meta):
+    if meta.get("columns") != MONTH_COLUMNS or values.shape != (meta["rows"], len(MONTH_COLUMNS), 2):
+        return None
+    return ClimateEstimate(meta["states"], meta["districts"], values)
+
+
+def load_or_build(cache_dir=CACHE_DIR):
+    """Map the cache if it matches the source files, otherwise rebuild it"""
+    return npy_cache.load_or_build(
+        cache_dir, CACHE_NAME, CACHE_VERSION, sources_sha256(), build, to_cache, from_cache,
+        "Climate estimates", lambda table: f"{len(table)} districts")
+
+
+# Global table, loaded on first use
+estimate = None
+
+
+def get_estimate():
+    global estimate
+    if estimate is None:
+        estimate = load_or_build()
+    return estimate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the approximate district x month climate cache used by main.py")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build()
+    npy_cache.save(args.cache_dir, CACHE_NAME, *to_cache(table), CACHE_VERSION, sources_sha256())
+    print(f"✓ Wrote {len(table)} districts to {args.cache_dir} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,167 @@
+"""
+Crop-by-state yield statistics index
+Aggregates live in one float64 array; rows are found with a dict keyed by normalized (crop, state).
+The array is cached as a memory-mapped .npy next to a JSON sidecar keyed by the source CSV's hash,
+so every worker maps the same pages instead of re-parsing the CSV.
+Build the cache ahead of time with: python -m utils.crop_stats
+"""
+from utils import npy_cache
+import argparse
+import difflib
+import numpy as np
+import os
+import pandas as pd
+import time
+
+
+AGRICULTURE_CSV = '../Crop-Yield-Prediction-using-Machine-Learning-Algorithms/dataset/Agriculture In India.csv'
+CACHE_DIR = os.environ.get("CROP_STATS_CACHE_DIR", "data/cache")
+CACHE_NAME = "crop_stats"
+CACHE_VERSION = 1
+
+STAT_COLUMNS = ['Avg_Yield', 'Std_Yield', 'Min_Yield', 'Max_Yield', 'Avg_Area', 'Avg_Production']
+
+# Column positions in CropStatsIndex.values
+AVG_YIELD, STD_YIELD, MIN_YIELD, MAX_YIELD, AVG_AREA, AVG_PRODUCTION = range(len(STAT_COLUMNS))
+
+
+MAX_FALLBACK_ENTRIES = 10000
+
+
+def normalize(name):
+    return ' '.join(str(name).lower().split())
+
+
+class CropStatsIndex:
+    """
+    Exact lookups cost one dict hit. Names that miss (e.g. "cotton" for "Cotton(lint)",
+    or a slight misspelling) go through a prefix / fuzzy fallback once and are memoized.
+    """
+    def __init__(self, crops, states, values):
+        self.crops = [str(crop).strip() for crop in crops]
+        self.states = [str(state).strip() for state in states]
+        # np.asarray keeps a read-only memmap as-is instead of copying it
+        self.values = np.asarray(values, dtype=np.float64)
+
+        self.exact = {}
+        self.crops_by_state = {}
+        for i, (crop, state) in enumerate(zip(self.crops, self.states)):
+            key = (normalize(crop), normalize(state))
+            self.exact.setdefault(key, i)
+            self.crops_by_state.setdefault(key[1], []).append(key[0])
+
+        self.state_names = list(self.crops_by_state)
+        self.fallback = {}
+
+    def __len__(self):
+        return len(self.crops)
+
+    def find(self, crop, state):
+        """Row index for (crop, state), or None"""
+        key = (normalize(crop), normalize(state))
+        row = self.exact.get(key)
+        if row is not None:
+            return row
+
+        if key not in self.fallback:
+            if len(self.fallback) >= MAX_FALLBACK_ENTRIES:
+                self.fallback.clear()
+            self.fallback[key] = self._resolve(*key)
+        return self.fallback[key]
+
+    def _resolve(self, crop_key, state_key):
+        if state_key not in self.crops_by_state:
+            close = difflib.get_close_matches(state_key, self.state_names, n=1, cutoff=0.85)
+            if not close:
+                return None
+            state_key = close[0]
+            row = self.exact.get((crop_key, state_key))
+            if row is not None:
+                return row
+
+        candidates = self.crops_by_state[state_key]
+
+        # Prefix: "cotton" -> "cotton(lint)", shortest (most specific) name first
+        prefixed = sorted((name for name in candidates if name.startswith(crop_key)), key=len)
+        if prefixed:
+            return self.exact[(prefixed[0], state_key)]
+
+        close = difflib.get_close_matches(crop_key, candidates, n=1, cutoff=0.85)
+        if close:
+            return self.exact[(close[0], state_key)]
+        return None
+
+    def lookup(self, crop, state):
+        """Stats row for (crop, state) as a dict, or None"""
+        row = self.find(crop, state)
+        if row is None:
+            return None
+        return dict(zip(STAT_COLUMNS, self.values[row].tolist()), Crop=self.crops[row], State=self.states[row])
+
+    @classmethod
+    def from_frame(cls, stats):
+        """Build from the aggregated Crop / State / STAT_COLUMNS frame"""
+        values = np.ascontiguousarray(stats[STAT_COLUMNS].to_numpy(dtype=np.float64))
+        return cls(stats['Crop'].tolist(), stats['State'].tolist(), values)
+
+
+def aggregate_csv(path=AGRICULTURE_CSV):
+    """Average production statistics by crop and state from the raw dataset"""
+    df = pd.read_csv(path)
+    df = df.dropna()
+    
+    # Calculate average yield per acre by crop and state
+    df['Yield_Per_Acre'] = df['Production'] / df['Area']
+    
+    # Group by crop and state to get averages
+    stats = df.groupby(['Crop', 'State_Name']).agg({
+        'Yield_Per_Acre': ['mean', 'std', 'min', 'max'],
+        'Area': 'mean',
+        'Production': 'mean'
+    }).reset_index()
+    
+    stats.columns = ['Crop', 'State'] + STAT_COLUMNS
+    return stats
+
+
+def to_cache(index):
+    return index.values, {
+        "columns": STAT_COLUMNS,
+        "rows": len(index),
+        "crops": index.crops,
+        "states": index.states,
+    }
+
+
+def from_cache(values, meta):
+    if meta.get("columns") != STAT_COLUMNS or values.shape != (meta["rows"], len(STAT_COLUMNS)):
+        return None
+    return CropStatsIndex(meta["crops"], meta["states"], values)
+
+
+def build_cache(source=AGRICULTURE_CSV, cache_dir=CACHE_DIR):
+    """Aggregate the CSV and write the cache; returns the index"""
+    source_hash = npy_cache.sources_sha256([source])
+    index = CropStatsIndex.from_frame(aggregate_csv(source))
+    npy_cache.save(cache_dir, CACHE_NAME, *to_cache(index), CACHE_VERSION, source_hash)
+    cached = npy_cache.load(cache_dir, CACHE_NAME, CACHE_VERSION, source_hash)
+    return (from_cache(*cached) if cached is not None else None) or index
+
+
+def load_or_build(source=AGRICULTURE_CSV, cache_dir=CACHE_DIR):
+    """Map the cache if it matches the source file's hash, otherwise rebuild it"""
+    return npy_cache.load_or_build(
+        cache_dir, CACHE_NAME, CACHE_VERSION, npy_cache.sources_sha256([source]),
+        lambda: CropStatsIndex.from_frame(aggregate_csv(source)), to_cache, from_cache,
+        "Crop statistics", lambda index: f"{len(index)} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the crop statistics cache used by yield_api")
+    parser.add_argument('--source', default=AGRICULTURE_CSV)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_cache(args.source, args.cache_dir)
+    print(f"✓ Wrote {len(index)} crop/state rows to {args.cache_dir} in {time.perf_counter() - start:.2f}s")
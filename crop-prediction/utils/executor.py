@@ -0,0 +1,119 @@
+"""
+Shared executor for CPU-bound inference
+Runs model and dataframe work in a bounded thread pool, off the asyncio event loop,
+with per-endpoint concurrency limits and queue/rejection counters
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from fastapi import HTTPException
+import asyncio
+import os
+import threading
+
+
+MAX_WORKERS = int(os.environ.get("INFERENCE_WORKERS", min(4, os.cpu_count() or 1)))
+DEFAULT_MAX_CONCURRENT = int(os.environ.get("INFERENCE_MAX_CONCURRENT", MAX_WORKERS))
+DEFAULT_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", 64))
+
+pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="inference")
+
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+class EndpointLimit:
+    """Caps how many calls of one endpoint run at once and how many may wait for a slot"""
+    def __init__(self, name, max_concurrent=DEFAULT_MAX_CONCURRENT, max_queue=DEFAULT_MAX_QUEUE):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server busy: too many pending '{self.name}' requests. Please retry.",
+                headers={"Retry-After": "1"},
+            )
+
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+limits = {}
+
+
+def configure(name, max_concurrent=DEFAULT_MAX_CONCURRENT, max_queue=DEFAULT_MAX_QUEUE):
+    """Set the concurrency limit for an endpoint (call at import time)"""
+    limits[name] = EndpointLimit(name, max_concurrent, max_queue)
+    return limits[name]
+
+
+def limit(name):
+    """Async context manager holding one concurrency slot of an endpoint"""
+    if name not in limits:
+        configure(name)
+    return limits[name].slot()
+
+
+def _track(func):
+    global _pending
+    try:
+        return func()
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def run(name, func, *args, **kwargs):
+    """Run a blocking function in the shared pool under the endpoint's concurrency limit"""
+    global _pending
+    async with limit(name):
+        with _pending_lock:
+            _pending += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, _track, partial(func, *args, **kwargs))
+
+
+def stats():
+    return {
+        "workers": MAX_WORKERS,
+        "pool_pending": _pending,
+        "pool_queue_depth": max(0, _pending - MAX_WORKERS),
+        "endpoints": {name: endpoint.stats() for name, endpoint in limits.items()},
+    }
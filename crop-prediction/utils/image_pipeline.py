@@ -0,0 +1,84 @@
+"""
+Image decode and preprocessing for the plant disease model
+Equivalent to Resize(255) -> CenterCrop(224) -> ToTensor -> Normalize, but decodes JPEGs
+with PIL draft mode and writes into reusable preallocated tensors
+"""
+from PIL import Image
+from torchvision import transforms
+import numpy as np
+import queue
+import torch
+import io
+
+
+RESIZE = 255
+CROP = 224
+MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
+STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
+
+# Pinned memory only helps host-to-GPU copies and needs CUDA to allocate
+PIN_MEMORY = torch.cuda.is_available()
+
+resize_crop = transforms.Compose([
+    transforms.Resize(RESIZE),
+    transforms.CenterCrop(CROP),
+])
+
+
+class TensorPool:
+    """Bounded free list of preallocated (3, 224, 224) input tensors"""
+    def __init__(self, size):
+        self.free = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self.free.put_nowait(self._allocate())
+
+    def _allocate(self):
+        tensor = torch.empty((3, CROP, CROP), dtype=torch.float32)
+        return tensor.pin_memory() if PIN_MEMORY else tensor
+
+    def acquire(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            # Pool exhausted under a burst: fall back to a fresh tensor rather than block
+            return self._allocate()
+
+    def release(self, tensor):
+        """Return a tensor; extras allocated during a burst are dropped once the pool is full"""
+        try:
+            self.free.put_nowait(tensor)
+        except queue.Full:
+            pass
+
+
+def decode(image_bytes, min_size=RESIZE):
+    """Decode to RGB, letting the JPEG decoder downscale by 1/2, 1/4 or 1/8 when the photo is large"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == 'JPEG':
+        # draft() keeps both sides >= the requested size, so Resize(255) still sees enough pixels
+        image.draft('RGB', (min_size, min_size))
+    return image.convert('RGB')
+
+
+def dhash(image, size=8):
+    """64-bit difference hash: survives re-encoding and small resizes of the same photo"""
+    gray = np.asarray(image.convert('L').resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+def preprocess(image_bytes, out=None):
+    """Decode and normalize one image into `out` (or a new tensor) and return it"""
+    return to_tensor(decode(image_bytes), out)
+
+
+def to_tensor(image, out=None):
+    """Resize, crop and normalize a decoded RGB image"""
+    image = resize_crop(image)
+    pixels = torch.from_numpy(np.array(image, dtype=np.uint8)).permute(2, 0, 1)
+
+    if out is None:
+        out = torch.empty((3, CROP, CROP), dtype=torch.float32)
+    out.copy_(pixels)
+    out.div_(255).sub_(MEAN).div_(STD)
+    return out
@@ -0,0 +1,314 @@
+"""
+In-memory market price table over data/price (mandi arrivals)
+Text columns are dictionary-encoded into int32 codes, dates are stored as day numbers and prices
+as float32, all in growable NumPy arrays. Row lists indexed by commodity and by (state, district)
+narrow every query; new arrivals are appended in place without reloading the file.
+Persisted appends go to a separate file (APPENDS_CSV) that is loaded after data/price, which is never written.
+"""
+from datetime import date, datetime
+from utils import name_resolver, spatial_index
+import csv
+import numpy as np
+import os
+import pandas as pd
+import threading
+
+
+PRICE_CSV = 'data/price'
+APPENDS_CSV = os.environ.get("PRICE_APPENDS_CSV", 'data/price_appends')
+
+TEXT_COLUMNS = ['state', 'district', 'market', 'commodity', 'variety']
+PRICE_COLUMNS = ['min_price', 'max_price', 'modal_price']
+CSV_COLUMNS = TEXT_COLUMNS + ['arrival_date'] + PRICE_COLUMNS
+
+DATE_FORMAT = '%d/%m/%Y'
+ISO_DATE_FORMAT = '%Y-%m-%d'
+EPOCH = date(1970, 1, 1)
+
+INITIAL_CAPACITY = 1024
+
+
+def to_day(value):
+    """dd/mm/yyyy or yyyy-mm-dd string, date or datetime -> days since 1970-01-01"""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        text = str(value).strip()
+        try:
+            value = datetime.strptime(text, DATE_FORMAT).date()
+        except ValueError:
+            try:
+                value = datetime.strptime(text, ISO_DATE_FORMAT).date()
+            except ValueError:
+                raise Exception(f"Invalid date '{text}'. Use dd/mm/yyyy or yyyy-mm-dd")
+    return (value - EPOCH).days
+
+
+def from_day(day):
+    return date.fromordinal(EPOCH.toordinal() + int(day)).strftime(DATE_FORMAT)
+
+
+class Dictionary:
+    """Value <-> int32 code for one text column; lookups are case-insensitive"""
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        self.index = None
+
+    def encode(self, value):
+        value = str(value).strip()
+        key = name_resolver.normalize(value)
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.values)
+            self.codes[key] = code
+            self.values.append(value)
+            self.index = None
+        return code
+
+    def find(self, value):
+        """Code for an exact or closest value, or None"""
+        code = self.codes.get(name_resolver.normalize(value))
+        if code is not None:
+            return code
+        if self.index is None:
+            self.index = name_resolver.TrigramIndex(self.values)
+        name, score = self.index.resolve(value)
+        if name is None or score < name_resolver.MIN_SCORE:
+            return None
+        return self.codes[name_resolver.normalize(name)]
+
+
+class GrowableArray:
+    """A NumPy array with amortized O(1) appends"""
+    def __init__(self, dtype, capacity=INITIAL_CAPACITY):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class PriceTable:
+    def __init__(self):
+        self.dictionaries = {column: Dictionary() for column in TEXT_COLUMNS}
+        self.codes = {column: GrowableArray(np.int32) for column in TEXT_COLUMNS}
+        self.days = GrowableArray(np.int32)
+        self.prices = {column: GrowableArray(np.float32) for column in PRICE_COLUMNS}
+
+        self.by_commodity = {}  # commodity code -> [row]
+        self.by_place = {}      # (state code, district code) -> [row]
+        self.coordinates = {}   # (state code, district code) -> (lat, lon) or None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.days.size
+
+    @classmethod
+    def from_csv(cls, path=PRICE_CSV, appends_path=APPENDS_CSV):
+        """The baseline price file, followed by persisted appends when that file exists"""
+        table = cls()
+        # The published file has rows with an unreported (0) max_price, so it is loaded as-is
+        table.append(pd.read_csv(path), validate=False)
+        if appends_path and os.path.exists(appends_path) and os.path.getsize(appends_path) > 0:
+            table.append(pd.read_csv(appends_path))
+        return table
+
+    def append(self, rows, validate=True):
+        """
+        Add arrival rows (a DataFrame, or dicts with CSV_COLUMNS). Returns the number added.
+        Rows with missing fields, or with validate, negative prices or min <= modal <= max broken,
+        raise before anything is written.
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        if frame.empty:
+            return 0
+        missing = [column for column in CSV_COLUMNS if column not in frame.columns]
+        if missing:
+            raise Exception(f"Missing columns: {', '.join(missing)}")
+        if frame[CSV_COLUMNS].isna().any().any():
+            raise Exception("Price rows must not contain empty fields")
+
+        days = [to_day(value) for value in frame['arrival_date']]
+        prices = {column: pd.to_numeric(frame[column]).to_numpy(dtype=np.float32) for column in PRICE_COLUMNS}
+        if validate:
+            check_prices(prices)
+
+        with self.lock:
+            codes = {column: [self.dictionaries[column].encode(v) for v in frame[column]] for column in TEXT_COLUMNS}
+            start = len(self)
+            for column in TEXT_COLUMNS:
+                self.codes[column].extend(codes[column])
+            for column in PRICE_COLUMNS:
+                self.prices[column].extend(prices[column])
+            # Dates last: len(self) only grows once every column holds the new rows
+            self.days.extend(days)
+
+            for offset, (commodity, state, district) in enumerate(
+                    zip(codes['commodity'], codes['state'], codes['district'])):
+                self.by_commodity.setdefault(commodity, []).append(start + offset)
+                self.by_place.setdefault((state, district), []).append(start + offset)
+
+        name_resolver.get_resolver().register('price', zip(frame['state'], frame['district']))
+        return len(frame)
+
+    def _rows(self, commodity, state=None, district=None):
+        """Row ids for a commodity, narrowed to a state / district when given"""
+        commodity_code = self.dictionaries['commodity'].find(commodity)
+        if commodity_code is None:
+            raise Exception(f"Commodity '{commodity}' not found")
+        rows = np.array(self.by_commodity.get(commodity_code, []), dtype=np.int64)
+
+        if state:
+            match = name_resolver.get_resolver().resolve(state, district or None, source='price')
+            if match is None:
+                place = f"district '{district}' in state '{state}'" if district else f"state '{state}'"
+                raise Exception(f"No price data for {place}")
+            state_code = self.dictionaries['state'].codes[name_resolver.normalize(match["state"])]
+            if match["district"] is not None:
+                district_code = self.dictionaries['district'].codes[name_resolver.normalize(match["district"])]
+                place_rows = np.array(self.by_place.get((state_code, district_code), []), dtype=np.int64)
+                rows = np.intersect1d(rows, place_rows, assume_unique=True)
+            else:
+                rows = rows[self.codes['state'].view()[rows] == state_code]
+        return rows
+
+    def _record(self, row, **extra):
+        record = {column: self.dictionaries[column].values[self.codes[column].data[row]] for column in TEXT_COLUMNS}
+        record["arrival_date"] = from_day(self.days.data[row])
+        record.update({column: float(self.prices[column].data[row]) for column in PRICE_COLUMNS})
+        record.update(extra)
+        return record
+
+    def _latest_per_market(self, rows):
+        """
+        The most recent row of each (state, district, market, variety); later appends win ties.
+        Markets are keyed by their place too, since the same market name occurs in several districts.
+        """
+        if len(rows) == 0:
+            return rows
+        keys = [self.codes[column].view()[rows] for column in ('state', 'district', 'market', 'variety')]
+        order = np.lexsort([rows, self.days.view()[rows]] + keys[::-1])
+        keys = [key[order] for key in keys]
+        changed = np.zeros(len(rows) - 1, dtype=bool)
+        for key in keys:
+            changed |= key[1:] != key[:-1]
+        return rows[order][np.append(changed, True)]
+
+    def latest(self, commodity, state=None, district=None):
+        """Latest prices per market and variety, newest first"""
+        rows = self._latest_per_market(self._rows(commodity, state, district))
+        rows = rows[np.argsort(-self.days.view()[rows], kind='stable')]
+        return [self._record(row) for row in rows]
+
+    def price_range(self, commodity, state=None, district=None, since=None, until=None):
+        """Min / max and modal-price distribution across matching arrivals"""
+        rows = self._rows(commodity, state, district)
+        days = self.days.view()[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if since is not None:
+            keep &= days >= to_day(since)
+        if until is not None:
+            keep &= days <= to_day(until)
+        rows = rows[keep]
+        if len(rows) == 0:
+            return {"count": 0}
+
+        modal = self.prices['modal_price'].view()[rows]
+        p25, median, p75 = np.percentile(modal, [25, 50, 75]).tolist()
+        return {
+            "count": int(len(rows)),
+            "markets": int(len(np.unique(self.codes['market'].view()[rows]))),
+            "from": from_day(days[keep].min()),
+            "to": from_day(days[keep].max()),
+            "min_price": float(self.prices['min_price'].view()[rows].min()),
+            "max_price": float(self.prices['max_price'].view()[rows].max()),
+            "modal_mean": round(float(modal.mean()), 2),
+            "modal_p25": p25,
+            "modal_median": median,
+            "modal_p75": p75,
+        }
+
+    def nearest_markets(self, commodity, lat, lon, k=5):
+        """Latest price at the k markets closest to a coordinate (markets sit at their district's centroid)"""
+        locator = spatial_index.get_locator()
+        rows = self._latest_per_market(self._rows(commodity))
+
+        places = list(zip(self.codes['state'].view()[rows].tolist(), self.codes['district'].view()[rows].tolist()))
+        for place in set(places) - self.coordinates.keys():
+            state, district = place
+            self.coordinates[place] = locator.coordinates(
+                self.dictionaries['district'].values[district], self.dictionaries['state'].values[state])
+        located = [i for i, place in enumerate(places) if self.coordinates[place] is not None]
+        if not located:
+            return []
+
+        coords = np.radians([self.coordinates[places[i]] for i in located])
+        lat, lon = np.radians(lat), np.radians(lon)
+        # Haversine distance to every candidate market at once
+        a = (np.sin((coords[:, 0] - lat) / 2) ** 2
+             + np.cos(lat) * np.cos(coords[:, 0]) * np.sin((coords[:, 1] - lon) / 2) ** 2)
+        distances = 2 * spatial_index.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+        order = np.argsort(distances, kind='stable')[:k]
+        return [self._record(rows[located[i]], distance_km=round(float(distances[i]), 1)) for i in order]
+
+    def commodities(self):
+        return sorted(self.dictionaries['commodity'].values)
+
+    def stats(self):
+        return {
+            "rows": len(self),
+            "capacity": len(self.days.data),
+            "states": len(self.dictionaries['state'].values),
+            "districts": len(self.dictionaries['district'].values),
+            "markets": len(self.dictionaries['market'].values),
+            "commodities": len(self.dictionaries['commodity'].values),
+            "varieties": len(self.dictionaries['variety'].values),
+        }
+
+
+def check_prices(prices):
+    """Raise unless every row has non-negative prices with min <= modal <= max"""
+    low, modal, high = (np.asarray(prices[column]) for column in ('min_price', 'modal_price', 'max_price'))
+    bad = np.flatnonzero((low < 0) | (modal < 0) | (high < 0) | (low > modal) | (modal > high))
+    if len(bad):
+        row = int(bad[0])
+        raise Exception(f"Row {row}: prices must be non-negative with min_price <= modal_price <= max_price "
+                        f"(got {low[row]:g}, {modal[row]:g}, {high[row]:g}); {len(bad)} invalid row(s)")
+
+
+def append_csv(rows, path=APPENDS_CSV):
+    """Persist appended rows to the appends file so a restart sees them; prices are written exactly"""
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS, quoting=csv.QUOTE_ALL, extrasaction='ignore')
+        if is_new:
+            writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                **row,
+                "arrival_date": from_day(to_day(row["arrival_date"])),
+                **{column: repr(float(row[column])) for column in PRICE_COLUMNS},
+            })
+
+
+# Global table, loaded on first use
+table = None
+
+
+def get_table():
+    global table
+    if table is None:
+        table = PriceTable.from_csv()
+    return table
@@ -0,0 +1,146 @@
+"""
+Dynamic micro-batching for model inference
+Collects concurrent requests for up to max_batch_size items or max_wait_ms,
+runs them as one batch in a worker thread and routes each result back to its caller
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    process_batch(items) runs in the worker thread and must return one result per item.
+    A result that is an Exception instance is raised to that item's caller only.
+    discard(item), if given, is called for items never processed because their caller went
+    away or the batcher was closed, so resources they hold can be returned.
+    """
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=5, name="batcher", discard=None):
+        self.process_batch = process_batch
+        self.discard = discard
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.queue = None
+        self.arrived = None
+        self.current = []
+        self.processing = False
+        self.worker = None
+        self.loop = None
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        self._ensure_started()
+        future = self.loop.create_future()
+        self.queue.put_nowait((item, future))
+        self.arrived.set()
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done() or self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue()
+            self.arrived = asyncio.Event()
+            self.worker = loop.create_task(self._run())
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def _collect(self, batch):
+        """
+        Wait for one item, then keep collecting until the batch is full or the wait expires.
+        Items are only taken with get_nowait(), so a timeout firing can never drop one.
+        """
+        while not batch:
+            self.arrived.clear()
+            self._drain(batch)
+            if not batch:
+                await self.arrived.wait()
+        deadline = self.loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            self.arrived.clear()
+            self._drain(batch)
+            remaining = deadline - self.loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            waiter = self.loop.create_task(self.arrived.wait())
+            done, _ = await asyncio.wait([waiter], timeout=remaining)
+            if not done:
+                waiter.cancel()
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Held on self so close() can fail a batch that is still being collected or run
+            self.current = []
+            self.processing = False
+            batch = await self._collect(self.current)
+            self._discard([item for item, future in batch if future.done()])
+            batch = [(item, future) for item, future in batch if not future.done()]
+            self.current = batch
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+
+            # From here process_batch owns the items, even if this task is cancelled
+            self.processing = True
+            try:
+                results = await self.loop.run_in_executor(
+                    self.executor, self.process_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue  # caller went away
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.max_seen_batch,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+        }
+
+    async def close(self):
+        """Stop the worker; every queued or in-flight caller gets an exception instead of hanging"""
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.worker = None
+
+        pending = [] if self.processing else list(self.current)
+        while self.queue is not None and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        for _, future in list(self.current) + pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher closed"))
+        self.current = []
+        self._discard([item for item, _ in pending])
+
+    def _discard(self, items):
+        if self.discard is not None:
+            for item in items:
+                self.discard(item)
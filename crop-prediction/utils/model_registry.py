@@ -0,0 +1,88 @@
+"""
+Model registry for the crop recommender
+Loads the network weights, normalization statistics and label encoder once per process
+"""
+from model import net
+import torch
+import pickle
+import numpy as np
+import resource
+import sys
+import time
+
+
+MODEL_PATH = 'model/baseline/baseline.hdf5'
+NORMALIZATION_PATH = 'model/normalization/normalization.npz'
+ENCODER_PATH = 'model/pkl_files/encoder.pkl'
+
+INPUT_SIZE = 7
+NUM_CLASSES = 22
+
+
+class ModelRegistry:
+    """In-memory holder for everything get_prediction needs"""
+    def __init__(self, model, mean, std, encoder, load_time_ms, memory_bytes):
+        self.model = model
+        self.mean = mean
+        self.std = std
+        self.encoder = encoder
+        self.load_time_ms = load_time_ms
+        self.memory_bytes = memory_bytes
+
+    def stats(self):
+        return {
+            "model_path": MODEL_PATH,
+            "load_time_ms": round(self.load_time_ms, 2),
+            "model_memory_bytes": self.memory_bytes,
+            "process_peak_rss_bytes": _peak_rss_bytes(),
+            "num_classes": len(self.encoder.classes_),
+        }
+
+
+# Global registry, populated by load_registry()
+registry = None
+
+
+def _peak_rss_bytes():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _tensor_bytes(module, *tensors):
+    total = sum(p.numel() * p.element_size() for p in module.parameters())
+    total += sum(b.numel() * b.element_size() for b in module.buffers())
+    total += sum(t.numel() * t.element_size() for t in tensors)
+    return total
+
+
+def load_registry():
+    """Load the crop recommender artifacts from disk into the global registry"""
+    global registry
+
+    start = time.perf_counter()
+
+    model = net.Net_64_128_64(INPUT_SIZE, NUM_CLASSES)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location=torch.device('cpu'), weights_only=True))
+    model.eval()
+
+    normalization = np.load(NORMALIZATION_PATH)
+    mean = torch.tensor(normalization["mean"], dtype=torch.float32)
+    std = torch.tensor(normalization["std"], dtype=torch.float32)
+
+    with open(ENCODER_PATH, "rb") as file:
+        encoder = pickle.load(file)
+
+    load_time_ms = (time.perf_counter() - start) * 1000
+    registry = ModelRegistry(model, mean, std, encoder, load_time_ms, _tensor_bytes(model, mean, std))
+
+    print(f"✓ Crop model loaded in {load_time_ms:.1f} ms "
+          f"({registry.memory_bytes / 1024:.1f} KiB of tensors)")
+    return registry
+
+
+def get_registry():
+    """Return the loaded registry, loading it on first use outside the API"""
+    if registry is None:
+        return load_registry()
+    return registry
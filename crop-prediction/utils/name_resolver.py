@@ -0,0 +1,318 @@
+"""
+Fuzzy state / district name resolution shared by the APIs
+Every state and district in the rainfall normals, ApportionedIdentifiers.csv and the price file
+is indexed by character trigrams. A query resolves to the best canonical spelling of a given
+source plus a similarity score; results are memoized.
+"""
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import re
+import threading
+
+
+# source -> (path, state column, district column)
+SOURCES = {
+    'rainfall': ('data/district wise rainfall normal.csv', 'STATE_UT_NAME', 'DISTRICT'),
+    'apportioned': ('data/ApportionedIdentifiers.csv', 'State Name', 'District Name'),
+    'price': ('data/price', 'state', 'district'),
+}
+
+# Below this Dice similarity a query is considered unmatched
+MIN_SCORE = 0.5
+# A fuzzy district match must also beat the next different district by this much, so KANPUR is not
+# rewritten when KANPUR NAGAR and KANPUR DEHAT score the same
+DISTRICT_MARGIN = 0.15
+# With no state to narrow it, a district searched across every state must match this closely
+MIN_ANY_STATE_SCORE = 0.8
+MAX_CACHE_ENTRIES = 10000
+
+# Spellings and abbreviations that name the same state; every source's own spelling is
+# reachable from any of them
+STATE_VARIANTS = [
+    ['ORISSA', 'ODISHA'],
+    ['UTTARANCHAL', 'UTTARAKHAND', 'UK'],
+    ['CHATISGARH', 'CHHATTISGARH', 'CHATTISGARH', 'CG'],
+    ['HIMACHAL', 'HIMACHAL PRADESH', 'HP'],
+    ['PONDICHERRY', 'PUDUCHERRY'],
+    ['ANDAMAN AND NICOBAR ISLANDS', 'ANDAMAN AND NICOBAR', 'ANDAMAN NICOBAR'],
+    ['DADAR NAGAR HAVELI', 'DADRA AND NAGAR HAVELI'],
+    ['DAMAN AND DUI', 'DAMAN AND DIU'],
+    ['DELHI', 'NCT OF DELHI', 'NEW DELHI'],
+    ['JAMMU AND KASHMIR', 'J AND K', 'JK'],
+    ['UTTAR PRADESH', 'UP'],
+    ['MADHYA PRADESH', 'MP'],
+    ['ANDHRA PRADESH', 'AP'],
+    ['TAMIL NADU', 'TN'],
+    ['WEST BENGAL', 'WB'],
+]
+
+# Renamed cities, old district names and the rainfall file's truncated spellings
+DISTRICT_VARIANTS = [
+    ['BANGALORE', 'BENGALURU', 'BANGALORE URBAN', 'BENGALURU URBAN', 'BANGALORE URB'],
+    ['BANGALORE RURAL', 'BENGALURU RURAL', 'BANGALORE RUR'],
+    ['MYSORE', 'MYSURU'],
+    ['BELGAUM', 'BELAGAVI', 'BELGAM'],
+    ['DAKSHINA KANNADA', 'DAKSHIN KANNADA', 'DAKSHIN KANDA', 'MANGALORE', 'MANGALURU'],
+    ['GULBARGA', 'KALABURAGI'],
+    ['BOMBAY', 'MUMBAI', 'GREATER BOMBAY', 'MUMBAI CITY'],
+    ['NASIK', 'NASHIK'],
+    ['GURGAON', 'GURUGRAM'],
+    ['HISSAR', 'HISAR'],
+    ['BHATINDA', 'BATHINDA'],
+    ['ALLAHABAD', 'PRAYAGRAJ'],
+    ['CALCUTTA', 'KOLKATA'],
+    ['MADRAS', 'CHENNAI'],
+    ['TRIVANDRUM', 'THIRUVANANTHAPURAM'],
+]
+
+
+def normalize(name):
+    """Upper-case, '&' -> AND, punctuation dropped, whitespace collapsed"""
+    name = str(name).upper().replace('&', ' AND ')
+    name = re.sub(r'[^A-Z0-9 ]+', ' ', name)
+    return ' '.join(name.split())
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Canonical names plus aliases, searchable by trigram Dice similarity"""
+    def __init__(self, names, aliases=None):
+        self.names = []
+        self.exact = {}
+        keys = []
+        for name in names:
+            key = normalize(name)
+            if key and key not in self.exact:
+                self.exact[key] = len(self.names)
+                self.names.append(name)
+                keys.append(key)
+        for alias, name in (aliases or {}).items():
+            key = normalize(alias)
+            if key and key not in self.exact and normalize(name) in self.exact:
+                self.exact[key] = self.exact[normalize(name)]
+                self.names.append(name)
+                keys.append(key)
+
+        # Postings as arrays so a query is one bincount over the matching lists
+        postings = {}
+        self.gram_counts = np.empty(len(keys), dtype=np.float64)
+        for i, key in enumerate(keys):
+            grams = trigrams(key)
+            self.gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, query):
+        """(canonical name, score) of the closest entry; (None, 0.0) if nothing shares a trigram"""
+        name, score, _ = self.resolve_ranked(query)
+        return name, score
+
+    def resolve_ranked(self, query):
+        """(canonical name, score, score of the best different name) of the closest entry"""
+        key = normalize(query)
+        row = self.exact.get(key)
+        if row is not None:
+            return self.names[row], 1.0, 0.0
+
+        grams = trigrams(key)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return None, 0.0, 0.0
+        common = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        scores = 2.0 * common / (self.gram_counts + len(grams))
+        order = np.argsort(-scores, kind='stable')
+        best = self.names[order[0]]
+        # Aliases repeat their canonical name, so skip to the first entry naming something else
+        runner_up = next((scores[i] for i in order[1:] if self.names[i] != best), 0.0)
+        return best, float(scores[order[0]]), float(runner_up)
+
+
+class NameResolver:
+    """
+    Per-source state indexes and per-(source, state) district indexes. The 'all' source is the
+    union of every loaded source, spelled as first seen.
+    """
+    def __init__(self, sources=SOURCES, min_score=MIN_SCORE, district_margin=DISTRICT_MARGIN,
+                 min_any_state_score=MIN_ANY_STATE_SCORE):
+        self.min_score = min_score
+        self.district_margin = district_margin
+        self.min_any_state_score = max(min_score, min_any_state_score)
+        self.places = {}  # source -> {state: {district: None}}, dicts as insertion-ordered sets
+        self.state_indexes = {}
+        self.district_indexes = {}
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        for source, (path, state_column, district_column) in sources.items():
+            try:
+                df = pd.read_csv(path, usecols=[state_column, district_column])
+            except (OSError, ValueError) as e:
+                print(f"⚠ Name resolver skipping {source}: {e}")
+                continue
+            self.register(source, zip(df[state_column], df[district_column]))
+
+    def register(self, source, pairs):
+        """Add (state, district) pairs under a source name; district may be None for state-only vocabularies"""
+        places = self.places.setdefault(source, {})
+        union = self.places.setdefault('all', {}) if source != 'all' else places
+        for state, district in pairs:
+            if pd.isna(state):
+                continue
+            state = str(state).strip()
+            for target in (places, union):
+                districts = target.setdefault(state, {})
+                if district is not None and not pd.isna(district):
+                    # One entry per (state, district), however many rows repeat it
+                    districts[str(district).strip()] = None
+
+        with self.lock:
+            for key in [key for key in self.state_indexes if key in (source, 'all')]:
+                del self.state_indexes[key]
+            for key in [key for key in self.district_indexes if key[0] in (source, 'all')]:
+                del self.district_indexes[key]
+            self.cache.clear()
+
+    def sources(self):
+        return list(self.places)
+
+    @staticmethod
+    def _aliases(names, variant_groups):
+        """Map every variant to the spelling `names` uses for its group"""
+        own = {normalize(name): name for name in names}
+        aliases = {}
+        for variants in variant_groups:
+            spelled = next((own[normalize(v)] for v in variants if normalize(v) in own), None)
+            if spelled is not None:
+                aliases.update({variant: spelled for variant in variants})
+        return aliases
+
+    def _state_index(self, source):
+        index = self.state_indexes.get(source)
+        if index is None:
+            states = list(self.places.get(source, {}))
+            index = TrigramIndex(states, self._aliases(states, STATE_VARIANTS))
+            self.state_indexes[source] = index
+        return index
+
+    def _district_index(self, source, state):
+        key = (source, state)
+        index = self.district_indexes.get(key)
+        if index is None:
+            if state is None:
+                districts = [d for names in self.places.get(source, {}).values() for d in names]
+            else:
+                districts = list(self.places.get(source, {}).get(state, {}))
+            index = TrigramIndex(districts, self._aliases(districts, DISTRICT_VARIANTS))
+            self.district_indexes[key] = index
+        return index
+
+    def resolve_state(self, state, source='all'):
+        """(canonical state, score), or (None, score) below min_score"""
+        name, score = self._state_index(source).resolve(state)
+        return (name, score) if score >= self.min_score else (None, score)
+
+    def resolve(self, state, district=None, source='all'):
+        """
+        Best canonical {"state", "district", "score"} in `source`, or None.
+        The score is the lower of the state and district similarities. When the state resolves,
+        the district is only looked up inside it and never moved to another state. Only when no
+        state matches at all (missing or unrecognisable) is the district searched across every
+        state, and the returned state is then the one that owns it.
+        """
+        cache_key = (source, normalize(state), normalize(district) if district is not None else None)
+        with self.lock:
+            if cache_key in self.cache:
+                self.cache.move_to_end(cache_key)
+                self.hits += 1
+                return self.cache[cache_key]
+            self.misses += 1
+
+        result = self._resolve(state, district, source)
+
+        with self.lock:
+            self.cache[cache_key] = result
+            if len(self.cache) > MAX_CACHE_ENTRIES:
+                self.cache.popitem(last=False)
+        return result
+
+    def _resolve(self, state, district, source):
+        canonical_state, state_score = self.resolve_state(state, source)
+        if district is None:
+            if canonical_state is None:
+                return None
+            return {"state": canonical_state, "district": None, "score": round(state_score, 4)}
+
+        if canonical_state is not None:
+            name, score = self._match_district(source, canonical_state, district, self.min_score)
+            if name is None:
+                return None
+            return {"state": canonical_state, "district": name, "score": round(min(state_score, score), 4)}
+
+        # No state matched at all (missing or unrecognisable): search every district
+        name, score = self._match_district(source, None, district, self.min_any_state_score)
+        if name is None:
+            return None
+        owner = next(s for s, names in self.places[source].items() if name in names)
+        return {"state": owner, "district": name, "score": round(score, 4)}
+
+    def _match_district(self, source, state, district, min_score):
+        """
+        (district, score) for a fuzzy district query, or (None, score). Beyond min_score the match
+        must be clearly ahead of the next district, and may not just add or drop whole words:
+        KANPUR vs KANPUR NAGAR or JAIPUR RURAL vs JAIPUR are different districts, not misspellings.
+        """
+        name, score, runner_up = self._district_index(source, state).resolve_ranked(district)
+        if score >= 1.0:
+            return name, score
+        if score < min_score or score - runner_up < self.district_margin:
+            return None, score
+        query_words, name_words = set(normalize(district).split()), set(normalize(name).split())
+        if query_words < name_words or name_words < query_words:
+            return None, score
+        return name, score
+
+    def explain(self, state, district=None, source='all'):
+        """Which part of a (state, district) failed to resolve, as a message; None if it resolves"""
+        if self.resolve(state, district, source) is not None:
+            return None
+        canonical_state, _ = self.resolve_state(state, source)
+        if canonical_state is None:
+            if district is None:
+                return f"State '{state}' not found"
+            return f"State '{state}' not found, and no district '{district}' matches in any state"
+        return f"District '{district}' not found in state '{canonical_state}'"
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "sources": {source: sum(len(d) for d in places.values()) for source, places in self.places.items()},
+            "cached": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+
+# Global resolver, built on first use
+resolver = None
+resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    global resolver
+    if resolver is None:
+        with resolver_lock:
+            if resolver is None:
+                resolver = NameResolver()
+    return resolver
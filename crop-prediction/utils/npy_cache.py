@@ -0,0 +1,82 @@
+"""
+Memory-mapped .npy caches with a JSON sidecar
+A derived table is stored as <name>.npy (its array) next to <name>.json (format version, hash of
+the sources it was built from and whatever names are needed to rebuild it). Both files are
+replaced atomically and the array is memory-mapped on load, so every worker shares the same
+pages; a cache whose version or source hash doesn't match is rebuilt.
+"""
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+
+def sources_sha256(paths, *extra):
+    """Hash of `extra` (bytes, e.g. repr() of model constants) followed by each file's contents"""
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(value)
+    for path in paths:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(cache_dir, name):
+    return os.path.join(cache_dir, f"{name}.npy"), os.path.join(cache_dir, f"{name}.json")
+
+
+def save(cache_dir, name, values, meta, version, source_hash):
+    """Write values (.npy) and meta plus version / hash (.json); each file is replaced atomically"""
+    os.makedirs(cache_dir, exist_ok=True)
+    values_path, meta_path = cache_paths(cache_dir, name)
+    suffix = f".{os.getpid()}.tmp"
+
+    with open(values_path + suffix, 'wb') as file:
+        np.save(file, np.ascontiguousarray(values))
+    os.replace(values_path + suffix, values_path)
+
+    with open(meta_path + suffix, 'w') as file:
+        json.dump({"version": version, "source_sha256": source_hash, **meta}, file)
+    os.replace(meta_path + suffix, meta_path)
+
+
+def load(cache_dir, name, version, source_hash):
+    """(memory-mapped values, meta) of a cache built from the same sources, or None"""
+    values_path, meta_path = cache_paths(cache_dir, name)
+    try:
+        with open(meta_path) as file:
+            meta = json.load(file)
+        if meta.get("version") != version or meta.get("source_sha256") != source_hash:
+            return None
+        return np.load(values_path, mmap_mode='r'), meta
+    except (OSError, ValueError):
+        return None
+
+
+def load_or_build(cache_dir, name, version, source_hash, build, to_cache, from_cache,
+                  label, describe=len):
+    """
+    Map the cache if it matches source_hash, otherwise build() and write it.
+    to_cache(table) -> (values, meta); from_cache(values, meta) -> table, or None when the
+    cached layout doesn't fit. describe(table) goes in the log line.
+    """
+    start = time.perf_counter()
+
+    cached = load(cache_dir, name, version, source_hash)
+    table = from_cache(*cached) if cached is not None else None
+    if table is not None:
+        print(f"✓ {label} mapped from cache ({describe(table)}, {(time.perf_counter() - start) * 1000:.1f} ms)")
+        return table
+
+    table = build()
+    try:
+        save(cache_dir, name, *to_cache(table), version, source_hash)
+        cached = load(cache_dir, name, version, source_hash)
+        table = (from_cache(*cached) if cached is not None else None) or table
+    except OSError as e:
+        print(f"⚠ Could not write {label.lower()} cache: {e}")
+    print(f"✓ {label} built ({describe(table)}, {(time.perf_counter() - start) * 1000:.1f} ms)")
+    return table
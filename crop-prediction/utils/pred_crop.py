@@ -1,6 +1,5 @@
-from model import net
+from utils import model_registry
 import torch
-import pickle
 import numpy as np
 
 
@@ -9,31 +8,48 @@ def predict_crop(nitrogen, phosphorous, potassium, temperature, humidity, ph, ra
 
 
 def get_prediction(x):
-    model = net.Net_64_128_64(7, 22)
-    model.load_state_dict(torch.load('model/baseline/baseline.hdf5', map_location=torch.device('cpu'), weights_only=True))
-    model.eval()  # Set to evaluation mode
-    
-    normalization = np.load("model/normalization/normalization.npz")
-    mean = normalization["mean"]
-    std = normalization["std"]
-    print(x)
-    
+    registry = model_registry.get_registry()
+
     input_vector = torch.tensor(x, dtype=torch.float32)
-    mean_tensor = torch.tensor(mean, dtype=torch.float32)
-    std_tensor = torch.tensor(std, dtype=torch.float32)
-    input_vector = (input_vector - mean_tensor) / std_tensor
+    input_vector = (input_vector - registry.mean) / registry.std
 
     # Run prediction without gradient computation
     with torch.no_grad():
-        prediction = model(input_vector)
-
-    with open("model/pkl_files/encoder.pkl", "rb") as file:
-        encoder = pickle.load(file)
+        prediction = registry.model(input_vector)
 
     predicted = prediction.argmax().item()
-    encoded_labels = encoder.inverse_transform(np.array([predicted]))
+    encoded_labels = registry.encoder.inverse_transform(np.array([predicted]))
 
     # DEBUG
     # print("Encoded labels:", encoded_labels)
 
     return encoded_labels
+
+
+def predict_crop_batch(features, top_k=0):
+    """
+    Predict crops for an (n, 7) feature matrix in one forward pass.
+    Returns the labels and, if top_k > 0, the top_k (crop, probability) pairs per row.
+    """
+    registry = model_registry.get_registry()
+
+    inputs = torch.as_tensor(np.asarray(features, dtype=np.float32))
+    inputs = (inputs - registry.mean) / registry.std
+
+    with torch.no_grad():
+        probabilities = registry.model(inputs)
+
+    labels = registry.encoder.inverse_transform(probabilities.argmax(dim=1).numpy())
+
+    top = None
+    if top_k > 0:
+        top_k = min(top_k, probabilities.shape[1])
+        values, indices = probabilities.topk(top_k, dim=1)
+        classes = registry.encoder.classes_[indices.numpy()]
+        values = values.numpy()
+        top = [
+            [{"crop": str(crop), "probability": round(float(p), 4)} for crop, p in zip(row_classes, row_values)]
+            for row_classes, row_values in zip(classes, values)
+        ]
+
+    return labels, top
@@ -1,35 +1,127 @@
 import pandas as pd
+import numpy as np
 
 
-def get_rainfall(state, district, month):
-    df = pd.read_csv('data/district wise rainfall normal.csv')
-    
-    # Convert input to uppercase for case-insensitive matching
-    state_upper = state.upper()
-    district_upper = district.upper()
-    
-    # Try exact match first
-    row = df[(df['STATE_UT_NAME'].str.upper() == state_upper) & 
-             (df['DISTRICT'].str.upper() == district_upper)]
-    
-    if row.empty:
-        # Get available districts for this state for better error message
-        available_districts = df[df['STATE_UT_NAME'].str.upper() == state_upper]['DISTRICT'].unique()
-        if len(available_districts) > 0:
-            raise Exception(
-                f"District '{district}' not found in state '{state}'. "
-                f"Available districts: {', '.join(available_districts[:5])}..."
-            )
-        else:
-            available_states = df['STATE_UT_NAME'].unique()[:10]
+RAINFALL_CSV = 'data/district wise rainfall normal.csv'
+
+MONTH_COLUMNS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC',
+                 'ANNUAL', 'Jan-Feb', 'Mar-May', 'Jun-Sep', 'Oct-Dec']
+
+
+def normalize_key(name):
+    return str(name).strip().upper()
+
+
+class RainfallStore:
+    """
+    District rainfall normals parsed once into a (district x month) float32 array.
+    Rows are found through a dict keyed by normalized (state, district).
+    """
+    def __init__(self, path=RAINFALL_CSV):
+        df = pd.read_csv(path)
+
+        self.values = np.ascontiguousarray(df[MONTH_COLUMNS].to_numpy(dtype=np.float32))
+        self.column_index = {normalize_key(column): i for i, column in enumerate(MONTH_COLUMNS)}
+
+        self.row_index = {}
+        self.districts_by_state = {}
+        self.states = []
+        for i, (state, district) in enumerate(zip(df['STATE_UT_NAME'], df['DISTRICT'])):
+            state_key = normalize_key(state)
+            self.row_index.setdefault((state_key, normalize_key(district)), i)
+            if state_key not in self.districts_by_state:
+                self.districts_by_state[state_key] = []
+                self.states.append(state)
+            self.districts_by_state[state_key].append(district)
+
+    def find_row(self, state, district):
+        row = self.row_index.get((normalize_key(state), normalize_key(district)))
+        if row is None:
+            row = self.resolve_row(state, district)
+        return row
+
+    def resolve_row(self, state, district):
+        """Row for a misspelled or aliased (state, district), via the shared name resolver"""
+        from utils import name_resolver
+
+        match = name_resolver.get_resolver().resolve(state, district, source='rainfall')
+        if match is None:
+            return None
+        return self.row_index.get((normalize_key(match["state"]), normalize_key(match["district"])))
+
+    def lookup(self, state, district, month):
+        """Rainfall for one district and month column, raising a helpful error on a miss"""
+        row = self.find_row(state, district)
+
+        if row is None:
+            from utils import name_resolver
+
+            # Suggest districts for the state, as resolved, for a better error message
+            canonical_state, _ = name_resolver.get_resolver().resolve_state(state, source='rainfall')
+            available_districts = self.districts_by_state.get(normalize_key(canonical_state or state))
+            if available_districts:
+                raise Exception(
+                    f"District '{district}' not found in state '{canonical_state or state}'. "
+                    f"Available districts: {', '.join(available_districts[:5])}..."
+                )
+            else:
+                raise Exception(
+                    f"State '{state}' not found. "
+                    f"Try: {', '.join(self.states[:10])}..."
+                )
+
+        column = self.column_index.get(normalize_key(month))
+        if column is None:
             raise Exception(
-                f"State '{state}' not found. "
-                f"Try: {', '.join(available_states)}..."
-            )
-    
-    rainfall = row[month].values
-    if rainfall.shape[0] == 0:
-        raise Exception(
-            f"Unable to match month:{month} with the state:{state} and district:{district}")
-    
-    return rainfall
+                f"Unable to match month:{month} with the state:{state} and district:{district}")
+
+        return float(self.values[row, column])
+
+    def lookup_batch(self, states, districts, months):
+        """Rainfall for many rows at once; unmatched rows come back as NaN"""
+        rows = np.fromiter(
+            (self.row_index.get((normalize_key(s), normalize_key(d)), -1) for s, d in zip(states, districts)),
+            dtype=np.int64)
+
+        # Resolve each distinct misspelled pair once
+        misses = np.flatnonzero(rows < 0)
+        if len(misses) > 0:
+            states, districts = list(states), list(districts)
+            resolved = {}
+            for i in misses:
+                pair = (states[i], districts[i])
+                if pair not in resolved:
+                    row = self.resolve_row(*pair)
+                    resolved[pair] = -1 if row is None else row
+                rows[i] = resolved[pair]
+        columns = np.fromiter(
+            (self.column_index.get(normalize_key(m), -1) for m in months),
+            dtype=np.int64, count=len(rows))
+
+        rainfall = np.full(len(rows), np.nan)
+        valid = (rows >= 0) & (columns >= 0)
+        rainfall[valid] = self.values[rows[valid], columns[valid]]
+        return rainfall
+
+
+# Global store, built on first use
+store = None
+
+
+def get_store():
+    global store
+    if store is None:
+        store = RainfallStore()
+    return store
+
+
+def get_rainfall(state, district, month):
+    return get_store().lookup(state, district, month)
+
+
+def get_rainfall_batch(states, districts, months):
+    """
+    Look up rainfall for many (state, district, month) rows at once.
+    Rows that do not match a district or month come back as NaN.
+    """
+    return get_store().lookup_batch(states, districts, months)
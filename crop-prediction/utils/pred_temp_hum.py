@@ -1,5 +1,5 @@
-import requests
-import os
+from utils import climate_estimate, spatial_index, weather_client
+import numpy as np
 
 
 # Default temperature and humidity values for major regions in India
@@ -31,36 +31,120 @@ REGION_DEFAULTS = {
 }
 
 
+# Known cities blended for each district that has no value of its own
+NEIGHBOURS = 4
+
+
+class ClimateField:
+    """
+    Spreads REGION_DEFAULTS to every located district by inverse-distance weighting over the
+    NEIGHBOURS closest known cities. District values are precomputed, so lookups are a dict hit.
+    """
+    def __init__(self, locator, known=REGION_DEFAULTS):
+        self.locator = locator
+        names, points, values = [], [], []
+        for name, climate in known.items():
+            point = locator.coordinates(name) if name != 'DEFAULT' else None
+            if point is not None:
+                names.append(name)
+                points.append(point)
+                values.append(climate)
+        self.names = names
+        points = np.array(points)
+        self.interpolator = spatial_index.IDWInterpolator(points[:, 0], points[:, 1], values, k=NEIGHBOURS)
+        self.district_values, self.nearest_km = self.interpolator.query(locator.lat, locator.lon)
+
+    def for_district(self, district, state=None):
+        """(temperature, humidity, km to the nearest known city), or None if the district can't be located"""
+        row = self.locator.find_row(district, state)
+        if row is None:
+            return None
+        temp, humidity = self.district_values[row]
+        return float(temp), float(humidity), float(self.nearest_km[row])
+
+    def at(self, lat, lon):
+        (temp, humidity), nearest_km = self.interpolator.at(lat, lon)
+        return float(temp), float(humidity), nearest_km
+
+
+# Global field, built on first use
+field = None
+
+
+def get_field():
+    global field
+    if field is None:
+        field = ClimateField(spatial_index.get_locator())
+    return field
+
+
+def get_temp_hum_at(lat, lon):
+    """Interpolated temperature and humidity for a raw coordinate"""
+    temp, humidity, _ = get_field().at(lat, lon)
+    return (temp, humidity)
+
+
 def get_temp_hum(district, state=None, month=None):
+    """
+    Get temperature and humidity for a district without blocking on the network.
+    With CLIMATE_ESTIMATES=1 and a month, answers from the approximate monthly table; otherwise
+    uses live weather already cached by the weather client, then offline values.
+    """
+    estimate = month_temp_hum(district, state, month)
+    if estimate is not None:
+        return estimate
+    live = weather_client.get_client().cached(district, allow_stale=True)
+    if live is not None:
+        return live
+    return offline_temp_hum(district, state)
+
+
+async def get_temp_hum_async(district, state=None, month=None):
     """
     Get temperature and humidity for a district.
-    First tries OpenWeatherMap API, falls back to default values if API fails.
+    With CLIMATE_ESTIMATES=1 and a month, answers from the approximate monthly table without any
+    network call. Otherwise tries the OpenWeatherMap API, falls back to default values if the API fails.
     """
-    
-    # Try API first if key exists
-    if os.path.exists(".api_key.txt"):
-        try:
-            with open(".api_key.txt", "r") as file:
-                API_KEY = file.read().strip()
-            
-            # Skip if API key is placeholder or empty
-            if API_KEY and API_KEY != "your_api_key_here" and len(API_KEY) > 10:
-                url = f"https://api.openweathermap.org/data/2.5/weather?q={district},IN&appid={API_KEY}"
-                response = requests.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    humidity = data['main']['humidity']
-                    temp = (data['main']['temp_min'] + data['main']['temp_max']) / 2 - 273.15
-                    print(f"✓ Using live weather data for {district}: {temp:.1f}°C, {humidity}% humidity")
-                    return (temp, humidity)
-                else:
-                    print(f"⚠ API call failed (status {response.status_code}), using default values")
-        except Exception as e:
-            print(f"⚠ API error: {e}, using default values")
-    
-    # Fallback to default values
+    estimate = month_temp_hum(district, state, month)
+    if estimate is not None:
+        return estimate
+    live = await weather_client.get_client().get(district)
+    if live is not None:
+        return live
+    return offline_temp_hum(district, state)
+
+
+def month_temp_hum(district, state, month):
+    """Approximate value for a district and month / season; None when estimates are off or unknown"""
+    if not month or not climate_estimate.ENABLED:
+        return None
+    try:
+        return climate_estimate.get_estimate().lookup(district, state, month)
+    except Exception as e:
+        print(f"⚠ Climate estimates unavailable: {e}")
+        return None
+
+
+def offline_temp_hum(district, state=None):
+    """REGION_DEFAULTS, interpolated from the nearest known cities, or DEFAULT"""
     district_upper = district.upper()
-    temp, humidity = REGION_DEFAULTS.get(district_upper, REGION_DEFAULTS['DEFAULT'])
+    if district_upper in REGION_DEFAULTS:
+        temp, humidity = REGION_DEFAULTS[district_upper]
+        print(f"✓ Using default climate data for {district}: {temp}°C, {humidity}% humidity")
+        return (temp, humidity)
+
+    # Otherwise interpolate from the nearest known cities
+    try:
+        interpolated = get_field().for_district(district, state)
+    except Exception as e:
+        print(f"⚠ Spatial index unavailable: {e}")
+        interpolated = None
+    if interpolated is not None:
+        temp, humidity, nearest_km = interpolated
+        print(f"✓ Using interpolated climate data for {district}: {temp:.1f}°C, {humidity:.0f}% humidity "
+              f"(nearest known city {nearest_km:.0f} km)")
+        return (temp, humidity)
+
+    temp, humidity = REGION_DEFAULTS['DEFAULT']
     print(f"✓ Using default climate data for {district}: {temp}°C, {humidity}% humidity")
     return (temp, humidity)
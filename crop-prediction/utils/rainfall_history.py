@@ -0,0 +1,221 @@
+"""
+Multi-year rainfall engine over the 1901-2015 IMD subdivision series
+The CSV is loaded once into a (subdivision x year x period) float32 cube, where the periods are
+the 12 months followed by the ANNUAL and seasonal totals. Per-period statistics are precomputed,
+so normals, percentiles, anomalies and drought probabilities are array lookups.
+"""
+from utils.pred_rainfall import normalize_key
+import numpy as np
+import pandas as pd
+
+
+HISTORY_CSV = 'data/rainfall in india 1901-2015.csv'
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+PERIODS = MONTHS + ['ANNUAL', 'Jan-Feb', 'Mar-May', 'Jun-Sep', 'Oct-Dec']
+
+# IMD calls a season "deficient" when rainfall is 20% or more below normal
+DROUGHT_DEPARTURE = -0.20
+
+# States in the district normals file -> IMD meteorological subdivisions covering them.
+# States with several subdivisions are resolved per district by comparing monthly profiles.
+STATE_SUBDIVISIONS = {
+    'ANDAMAN AND NICOBAR ISLANDS': ['ANDAMAN & NICOBAR ISLANDS'],
+    'ARUNACHAL PRADESH': ['ARUNACHAL PRADESH'],
+    'ASSAM': ['ASSAM & MEGHALAYA'],
+    'MEGHALAYA': ['ASSAM & MEGHALAYA'],
+    'MANIPUR': ['NAGA MANI MIZO TRIPURA'],
+    'MIZORAM': ['NAGA MANI MIZO TRIPURA'],
+    'NAGALAND': ['NAGA MANI MIZO TRIPURA'],
+    'TRIPURA': ['NAGA MANI MIZO TRIPURA'],
+    'WEST BENGAL': ['GANGETIC WEST BENGAL', 'SUB HIMALAYAN WEST BENGAL & SIKKIM'],
+    'SIKKIM': ['SUB HIMALAYAN WEST BENGAL & SIKKIM'],
+    'ORISSA': ['ORISSA'],
+    'JHARKHAND': ['JHARKHAND'],
+    'BIHAR': ['BIHAR'],
+    'UTTAR PRADESH': ['EAST UTTAR PRADESH', 'WEST UTTAR PRADESH'],
+    'UTTARANCHAL': ['UTTARAKHAND'],
+    'HARYANA': ['HARYANA DELHI & CHANDIGARH'],
+    'CHANDIGARH': ['HARYANA DELHI & CHANDIGARH'],
+    'DELHI': ['HARYANA DELHI & CHANDIGARH'],
+    'PUNJAB': ['PUNJAB'],
+    'HIMACHAL': ['HIMACHAL PRADESH'],
+    'JAMMU AND KASHMIR': ['JAMMU & KASHMIR'],
+    'RAJASTHAN': ['EAST RAJASTHAN', 'WEST RAJASTHAN'],
+    'MADHYA PRADESH': ['EAST MADHYA PRADESH', 'WEST MADHYA PRADESH'],
+    'GUJARAT': ['GUJARAT REGION', 'SAURASHTRA & KUTCH'],
+    'DADAR NAGAR HAVELI': ['GUJARAT REGION'],
+    'DAMAN AND DUI': ['GUJARAT REGION'],
+    'MAHARASHTRA': ['KONKAN & GOA', 'MADHYA MAHARASHTRA', 'MATATHWADA', 'VIDARBHA'],
+    'GOA': ['KONKAN & GOA'],
+    'CHATISGARH': ['CHHATTISGARH'],
+    'ANDHRA PRADESH': ['COASTAL ANDHRA PRADESH', 'TELANGANA', 'RAYALSEEMA'],
+    'TAMIL NADU': ['TAMIL NADU'],
+    'PONDICHERRY': ['TAMIL NADU'],
+    'KARNATAKA': ['COASTAL KARNATAKA', 'NORTH INTERIOR KARNATAKA', 'SOUTH INTERIOR KARNATAKA'],
+    'KERALA': ['KERALA'],
+    'LAKSHADWEEP': ['LAKSHADWEEP'],
+}
+
+
+class RainfallHistory:
+    def __init__(self, path=HISTORY_CSV):
+        df = pd.read_csv(path)
+
+        self.subdivisions = list(dict.fromkeys(df['SUBDIVISION']))
+        self.subdivision_index = {normalize_key(name): i for i, name in enumerate(self.subdivisions)}
+        self.period_index = {normalize_key(period): i for i, period in enumerate(PERIODS)}
+
+        self.first_year = int(df['YEAR'].min())
+        self.years = np.arange(self.first_year, int(df['YEAR'].max()) + 1)
+
+        # Missing subdivision-years and months stay NaN
+        self.cube = np.full((len(self.subdivisions), len(self.years), len(PERIODS)), np.nan, dtype=np.float32)
+        rows = df['SUBDIVISION'].map({name: i for i, name in enumerate(self.subdivisions)}).to_numpy()
+        self.cube[rows, df['YEAR'].to_numpy() - self.first_year] = df[PERIODS].to_numpy(dtype=np.float32)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.counts = np.sum(~np.isnan(self.cube), axis=1)      # (S, P)
+            self.mean = np.nanmean(self.cube, axis=1)               # (S, P)
+            self.std = np.nanstd(self.cube, axis=1)                 # (S, P)
+            self.departure = self.cube / self.mean[:, None, :] - 1  # (S, Y, P), fraction of normal
+
+        # Sorted along years (NaN last) for O(1) percentiles
+        self.sorted = np.sort(self.cube, axis=1)
+
+        self.district_subdivision = {}
+
+    def _subdivision(self, subdivision):
+        index = self.subdivision_index.get(normalize_key(subdivision))
+        if index is None:
+            raise Exception(f"Subdivision '{subdivision}' not found. Try: {', '.join(self.subdivisions[:10])}...")
+        return index
+
+    def _period(self, period):
+        index = self.period_index.get(normalize_key(period))
+        if index is None:
+            raise Exception(f"Unknown period '{period}'. Use one of: {', '.join(PERIODS)}")
+        return index
+
+    def series(self, subdivision, period):
+        """(years, rainfall) for one subdivision and period; a view into the cube"""
+        return self.years, self.cube[self._subdivision(subdivision), :, self._period(period)]
+
+    def normal(self, subdivision, period):
+        s, p = self._subdivision(subdivision), self._period(period)
+        return float(self.mean[s, p])
+
+    def percentile(self, subdivision, period, q):
+        """Linear-interpolated percentile (0-100) of the yearly totals"""
+        s, p = self._subdivision(subdivision), self._period(period)
+        n = self.counts[s, p]
+        if n == 0:
+            return float('nan')
+        values = self.sorted[s, :n, p]
+        position = np.clip(q, 0, 100) / 100 * (n - 1)
+        low = int(np.floor(position))
+        high = min(low + 1, n - 1)
+        return float(values[low] + (values[high] - values[low]) * (position - low))
+
+    def rolling_mean(self, subdivision, period, window=10):
+        """Trailing `window`-year mean per year, ignoring missing years (NaN until a value is seen)"""
+        _, values = self.series(subdivision, period)
+        present = ~np.isnan(values)
+        sums = np.cumsum(np.where(present, values, 0), dtype=np.float64)
+        counts = np.cumsum(present)
+        sums[window:] = sums[window:] - sums[:-window]
+        counts[window:] = counts[window:] - counts[:-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def anomaly(self, subdivision, period, year=None, value=None):
+        """z-score and fractional departure from normal for a year's total or a given value"""
+        s, p = self._subdivision(subdivision), self._period(period)
+        if value is None:
+            if year is None or not self.first_year <= year <= self.years[-1]:
+                raise Exception(f"Year must be between {self.first_year} and {self.years[-1]}")
+            value = self.cube[s, year - self.first_year, p]
+            if np.isnan(value):
+                raise Exception(f"No {PERIODS[p]} rainfall recorded for {self.subdivisions[s]} in {year}")
+        value = float(value)
+        std = self.std[s, p]
+        return {
+            "value": value,
+            "normal": float(self.mean[s, p]),
+            "z_score": float((value - self.mean[s, p]) / std) if std > 0 else 0.0,
+            "departure": float(value / self.mean[s, p] - 1) if self.mean[s, p] > 0 else 0.0,
+        }
+
+    def drought_probability(self, subdivision, period, threshold=DROUGHT_DEPARTURE, since=None):
+        """Share of recorded years whose rainfall departed from normal by `threshold` or worse"""
+        s, p = self._subdivision(subdivision), self._period(period)
+        departures = self.departure[s, :, p]
+        if since is not None:
+            departures = departures[max(0, since - self.first_year):]
+        recorded = ~np.isnan(departures)
+        if not recorded.any():
+            return float('nan')
+        return float(np.count_nonzero(departures[recorded] <= threshold) / np.count_nonzero(recorded))
+
+    def subdivision_for(self, state, district):
+        """
+        IMD subdivision for a district of the district-normals file.
+        In split states this is the climatologically closest subdivision, which can differ from the
+        administrative one near a boundary; callers that know the subdivision should pass it directly.
+        """
+        key = (normalize_key(state), normalize_key(district))
+        if key in self.district_subdivision:
+            return self.district_subdivision[key]
+
+        candidates = STATE_SUBDIVISIONS.get(key[0])
+        if not candidates:
+            raise Exception(f"No rainfall subdivision known for state '{state}'")
+
+        subdivision = candidates[0]
+        if len(candidates) > 1:
+            # Pick the subdivision whose monthly climatology is closest to the district's normals
+            from utils import pred_rainfall
+            store = pred_rainfall.get_store()
+            row = store.find_row(state, district)
+            if row is None:
+                raise Exception(f"District '{district}' not found in state '{state}'")
+            profile = store.values[row, :len(MONTHS)]
+            climatology = self.mean[[self.subdivision_index[name] for name in candidates], :len(MONTHS)]
+            subdivision = candidates[int(np.argmin(np.sum((climatology - profile) ** 2, axis=1)))]
+
+        self.district_subdivision[key] = subdivision
+        return subdivision
+
+    def summary(self, subdivision, period, window=10, year=None, value=None):
+        """Everything the API reports for one subdivision and period"""
+        years, values = self.series(subdivision, period)
+        rolling = self.rolling_mean(subdivision, period, window)
+        last = int(np.flatnonzero(~np.isnan(values))[-1]) if self.counts[self._subdivision(subdivision), self._period(period)] else None
+        result = {
+            "subdivision": self.subdivisions[self._subdivision(subdivision)],
+            "period": PERIODS[self._period(period)],
+            "years": [int(years[0]), int(years[-1])],
+            "normal": self.normal(subdivision, period),
+            "std": float(self.std[self._subdivision(subdivision), self._period(period)]),
+            "percentiles": {str(q): self.percentile(subdivision, period, q) for q in (10, 25, 50, 75, 90)},
+            "rolling_mean": {
+                "window": window,
+                "year": int(years[last]) if last is not None else None,
+                "value": float(rolling[last]) if last is not None else None,
+            },
+            "drought_probability": self.drought_probability(subdivision, period),
+        }
+        if year is not None or value is not None:
+            result["anomaly"] = self.anomaly(subdivision, period, year=year, value=value)
+        return result
+
+
+# Global engine, built on first use
+history = None
+
+
+def get_history():
+    global history
+    if history is None:
+        history = RainfallHistory()
+    return history
@@ -0,0 +1,137 @@
+"""
+LRU + TTL cache for prediction results
+Keys are content hashes; an optional directory of JSON files acts as a second, persistent tier.
+With a disk tier, get() and set() do blocking file I/O: call them off the event loop.
+"""
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+
+class ResultCache:
+    def __init__(self, max_size=1024, ttl_seconds=3600, disk_dir=None):
+        self.max_size = max(0, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @property
+    def blocking(self):
+        """True when get() / set() may touch the disk"""
+        return bool(self.disk_dir)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _expires_at(self):
+        return time.time() + self.ttl if self.ttl > 0 else float('inf')
+
+    def get(self, key):
+        """Return a copy of the cached value, or None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(value)
+                del self.entries[key]
+                self.expirations += 1
+
+        record = self._disk_get(key, now)
+        with self.lock:
+            if record is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        # Promote with the entry's original expiry, not a fresh TTL
+        expires_at, value = record
+        self._memory_set(key, value, expires_at)
+        return dict(value)
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        expires_at = self._expires_at()
+        self._memory_set(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+    def _memory_set(self, key, value, expires_at=None):
+        with self.lock:
+            self.entries[key] = (expires_at or self._expires_at(), dict(value))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_get(self, key, now):
+        """(expires_at, value) from the disk tier, or None"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path) as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if record.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record["expires_at"], record["value"]
+
+    def _disk_set(self, key, value, expires_at):
+        if not self.disk_dir:
+            return
+        record = {"expires_at": expires_at if expires_at != float('inf') else 1e18, "value": value}
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump(record, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠ Could not write cache entry: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "disk_dir": self.disk_dir,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
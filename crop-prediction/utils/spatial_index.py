@@ -0,0 +1,190 @@
+"""
+Nearest-district spatial index
+District centroids come from ApportionedIdentifiers.csv, with geocoded coordinates from
+rainfall_lat_long_fuzzy.csv filling the gaps when they fall inside the expected state.
+A haversine BallTree answers k-nearest queries for raw coordinates; values known at a few
+districts are spread to every other district by inverse-distance weighting.
+"""
+from sklearn.neighbors import BallTree
+from utils.pred_rainfall import normalize_key
+import ast
+import numpy as np
+import pandas as pd
+
+
+APPORTIONED_CSV = 'data/ApportionedIdentifiers.csv'
+GEOCODED_CSV = 'data/rainfall_lat_long_fuzzy.csv'
+
+EARTH_RADIUS_KM = 6371.0
+
+# Geocoded points further than this outside their state's known extent are discarded
+STATE_MARGIN_DEG = 1.0
+INDIA_BOUNDS = (6.0, 38.0, 68.0, 98.0)  # lat_min, lat_max, lon_min, lon_max
+
+# Spellings used by the rainfall files -> ApportionedIdentifiers state names
+STATE_ALIASES = {
+    'CHATISGARH': 'CHHATTISGARH',
+    'UTTARANCHAL': 'UTTARAKHAND',
+    'HIMACHAL': 'HIMACHAL PRADESH',
+}
+
+# Common city names -> district names in the coordinate files
+DISTRICT_ALIASES = {
+    'MUMBAI': 'BOMBAY',
+    'BENGALURU': 'BANGALORE',
+    'MYSURU': 'MYSORE',
+    'GURUGRAM': 'GURGAON',
+    'PRAYAGRAJ': 'ALLAHABAD',
+    'NASHIK': 'NASIK',
+    'HISAR': 'HISSAR',
+    'BATHINDA': 'BHATINDA',
+}
+
+
+def normalize_state(state):
+    state = normalize_key(state)
+    return STATE_ALIASES.get(state, state)
+
+
+def normalize_district(district):
+    district = normalize_key(district)
+    return DISTRICT_ALIASES.get(district, district)
+
+
+def to_radians(lat, lon):
+    return np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]).astype(np.float64))
+
+
+class DistrictLocator:
+    """Coordinates for (state, district) names and nearest-district queries"""
+    def __init__(self, apportioned_path=APPORTIONED_CSV, geocoded_path=GEOCODED_CSV):
+        states, districts, lats, lons = [], [], [], []
+
+        apportioned = pd.read_csv(apportioned_path)
+        for state, district, lat, lon in apportioned[['State Name', 'District Name', 'Latitude', 'Longitude']].itertuples(index=False):
+            states.append(normalize_state(state))
+            districts.append(normalize_key(district))
+            lats.append(float(lat))
+            lons.append(float(lon))
+
+        # Telangana was split from Andhra Pradesh after the rainfall normals were published
+        for i in [i for i, state in enumerate(states) if state == 'TELANGANA']:
+            states.append('ANDHRA PRADESH')
+            districts.append(districts[i])
+            lats.append(lats[i])
+            lons.append(lons[i])
+
+        bounds = {}
+        for state, lat, lon in zip(states, lats, lons):
+            lat_min, lat_max, lon_min, lon_max = bounds.get(state, (lat, lat, lon, lon))
+            bounds[state] = (min(lat_min, lat), max(lat_max, lat), min(lon_min, lon), max(lon_max, lon))
+
+        known = set(zip(states, districts))
+        self.rejected = 0
+        try:
+            geocoded = pd.read_csv(geocoded_path)
+        except OSError:
+            geocoded = pd.DataFrame(columns=['STATE_UT_NAME', 'DISTRICT', 'coord'])
+        for state, district, coord in geocoded[['STATE_UT_NAME', 'DISTRICT', 'coord']].itertuples(index=False):
+            key = (normalize_state(state), normalize_key(district))
+            if key in known:
+                continue
+            try:
+                point = ast.literal_eval(coord)
+                lat, lon = float(point['lat']), float(point['lon'])
+            except (ValueError, SyntaxError, KeyError, TypeError):
+                self.rejected += 1
+                continue
+            if not self._plausible(lat, lon, bounds.get(key[0])):
+                self.rejected += 1
+                continue
+            known.add(key)
+            states.append(key[0])
+            districts.append(key[1])
+            lats.append(lat)
+            lons.append(lon)
+
+        self.states = states
+        self.districts = districts
+        self.lat = np.array(lats)
+        self.lon = np.array(lons)
+        self.tree = BallTree(to_radians(self.lat, self.lon), metric='haversine')
+
+        self.row_index = {}
+        self.rows_by_district = {}
+        for i, key in enumerate(zip(states, districts)):
+            self.row_index.setdefault(key, i)
+            self.rows_by_district.setdefault(key[1], []).append(i)
+
+    @staticmethod
+    def _plausible(lat, lon, state_bounds):
+        lat_min, lat_max, lon_min, lon_max = INDIA_BOUNDS
+        if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
+            return False
+        if state_bounds is None:
+            return True
+        lat_min, lat_max, lon_min, lon_max = state_bounds
+        return (lat_min - STATE_MARGIN_DEG <= lat <= lat_max + STATE_MARGIN_DEG
+                and lon_min - STATE_MARGIN_DEG <= lon <= lon_max + STATE_MARGIN_DEG)
+
+    def __len__(self):
+        return len(self.districts)
+
+    def find_row(self, district, state=None):
+        """Row for a district, or None. Without a state, ambiguous names resolve to the first match."""
+        district_key = normalize_district(district)
+        if state:
+            row = self.row_index.get((normalize_state(state), district_key))
+            if row is not None:
+                return row
+        rows = self.rows_by_district.get(district_key)
+        return rows[0] if rows else None
+
+    def coordinates(self, district, state=None):
+        """(lat, lon) of a district, or None"""
+        row = self.find_row(district, state)
+        if row is None:
+            return None
+        return float(self.lat[row]), float(self.lon[row])
+
+    def nearest(self, lat, lon, k=1):
+        """(rows, distances_km) of the k districts closest to a coordinate"""
+        k = min(k, len(self))
+        distances, rows = self.tree.query(to_radians(lat, lon), k=k)
+        return rows[0], distances[0] * EARTH_RADIUS_KM
+
+
+class IDWInterpolator:
+    """Inverse-distance weighted interpolation over the k nearest known points"""
+    def __init__(self, lat, lon, values, k=4, power=2.0):
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(lat), -1)
+        self.k = min(k, len(self.values))
+        self.power = power
+        self.tree = BallTree(to_radians(lat, lon), metric='haversine')
+
+    def query(self, lat, lon):
+        """Interpolated values for arrays of coordinates; exact matches return the known value"""
+        distances, rows = self.tree.query(to_radians(lat, lon), k=self.k)
+        distances = distances * EARTH_RADIUS_KM
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / distances ** self.power
+        exact = np.isinf(weights)
+        weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum('nk,nkv->nv', weights, self.values[rows]), distances[:, 0]
+
+    def at(self, lat, lon):
+        """(values, distance_km to the nearest known point) for one coordinate"""
+        values, nearest_km = self.query(lat, lon)
+        return values[0], float(nearest_km[0])
+
+
+# Global locator, built on first use
+locator = None
+
+
+def get_locator():
+    global locator
+    if locator is None:
+        locator = DistrictLocator()
+    return locator
@@ -0,0 +1,269 @@
+"""
+Async OpenWeatherMap client for live temperature and humidity
+One pooled httpx connection pool; results cached per district with a TTL, and districts upstream
+answers with 404 remembered for a shorter one; concurrent requests for the same district share
+one upstream call; a circuit breaker stops calling a failing or slow upstream and serves the
+last known (possibly stale) value instead.
+Point WEATHER_API_URL at a local stub server to test without the real API.
+"""
+import asyncio
+import httpx
+import os
+import threading
+import time
+
+
+API_KEY_PATH = os.environ.get("WEATHER_API_KEY_PATH", ".api_key.txt")
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+TIMEOUT_SECONDS = float(os.environ.get("WEATHER_TIMEOUT", "2"))
+CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", "600"))
+STALE_TTL = float(os.environ.get("WEATHER_STALE_TTL", "21600"))  # how long a stale value may stand in
+NOT_FOUND_TTL = float(os.environ.get("WEATHER_NOT_FOUND_TTL", "300"))  # how long a 404 is remembered
+CACHE_SIZE = int(os.environ.get("WEATHER_CACHE_SIZE", "4096"))
+MAX_CONNECTIONS = int(os.environ.get("WEATHER_MAX_CONNECTIONS", "20"))
+FAILURE_THRESHOLD = int(os.environ.get("WEATHER_FAILURE_THRESHOLD", "3"))
+RESET_SECONDS = float(os.environ.get("WEATHER_RESET_SECONDS", "30"))
+
+
+def read_api_key(path=API_KEY_PATH):
+    """The API key, or None when the file is missing or holds a placeholder"""
+    try:
+        with open(path, "r") as file:
+            key = file.read().strip()
+    except OSError:
+        return None
+    if not key or key == "your_api_key_here" or len(key) <= 10:
+        return None
+    return key
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open -> half-open after
+    `reset_seconds`, when a single trial call decides whether to close again.
+    """
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_running:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class WeatherClient:
+    def __init__(self, api_key=None, base_url=WEATHER_API_URL, timeout=TIMEOUT_SECONDS,
+                 cache_ttl=CACHE_TTL, stale_ttl=STALE_TTL, not_found_ttl=NOT_FOUND_TTL, cache_size=CACHE_SIZE,
+                 max_connections=MAX_CONNECTIONS, breaker=None, transport=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = max(stale_ttl, cache_ttl)
+        self.not_found_ttl = not_found_ttl
+        self.cache_size = cache_size
+        self.max_connections = max_connections
+        self.breaker = breaker or CircuitBreaker()
+        self.transport = transport
+
+        self.http = None
+        self.cache = {}     # district -> (fetched_at, (temperature, humidity))
+        self.not_found = {}  # district -> when upstream answered 404
+        self.inflight = {}  # district -> asyncio.Task
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_found_hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.short_circuited = 0
+
+    @property
+    def enabled(self):
+        return self.api_key is not None
+
+    def _http(self):
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                transport=self.transport,
+            )
+        return self.http
+
+    @staticmethod
+    def _key(district):
+        return ' '.join(str(district).upper().split())
+
+    def cached(self, district, allow_stale=False):
+        """Cached (temperature, humidity) without touching the network, or None"""
+        with self.lock:
+            entry = self.cache.get(self._key(district))
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age < self.cache_ttl or (allow_stale and age < self.stale_ttl):
+            return entry[1]
+        return None
+
+    def _store(self, key, value):
+        with self.lock:
+            self.cache[key] = (time.monotonic(), value)
+            if len(self.cache) > self.cache_size:
+                # Dicts keep insertion order; drop the oldest entries
+                for old in list(self.cache)[:len(self.cache) - self.cache_size]:
+                    del self.cache[old]
+
+    async def get(self, district):
+        """Live (temperature, humidity) for a district, a stale cached value, or None"""
+        if not self.enabled:
+            return None
+
+        key = self._key(district)
+        value = self.cached(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._known_missing(key):
+            self.not_found_hits += 1
+            return None
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            if not self.breaker.allow():
+                self.short_circuited += 1
+                return self._stale(key)
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        # shield: one caller being cancelled must not cancel the shared upstream call
+        value = await asyncio.shield(task)
+        return value if value is not None else self._stale(key)
+
+    def _known_missing(self, key):
+        """True while an upstream 404 for this district is remembered"""
+        with self.lock:
+            answered_at = self.not_found.get(key)
+            if answered_at is None:
+                return False
+            if time.monotonic() - answered_at < self.not_found_ttl:
+                return True
+            del self.not_found[key]
+            return False
+
+    def _stale(self, key):
+        value = self.cached(key, allow_stale=True)
+        if value is not None:
+            self.stale_hits += 1
+        return value
+
+    async def _fetch(self, key):
+        self.upstream_calls += 1
+        try:
+            response = await self._http().get(self.base_url, params={"q": f"{key},IN", "appid": self.api_key})
+            if response.status_code != 200:
+                # An unknown city is an answer, not an outage
+                if response.status_code == 404:
+                    self.breaker.record_success()
+                    with self.lock:
+                        self.not_found[key] = time.monotonic()
+                        if len(self.not_found) > self.cache_size:
+                            for old in list(self.not_found)[:len(self.not_found) - self.cache_size]:
+                                del self.not_found[old]
+                    return None
+                raise Exception(f"status {response.status_code}")
+            data = response.json()
+            humidity = data['main']['humidity']
+            temp = (data['main']['temp_min'] + data['main']['temp_max']) / 2 - 273.15
+        except Exception as e:
+            self.upstream_errors += 1
+            self.breaker.record_failure()
+            print(f"⚠ Weather API error for {key}: {str(e) or type(e).__name__}")
+            return None
+
+        self.breaker.record_success()
+        value = (temp, humidity)
+        self._store(key, value)
+        print(f"✓ Using live weather data for {key}: {temp:.1f}°C, {humidity}% humidity")
+        return value
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "base_url": self.base_url,
+            "cache_size": len(self.cache),
+            "cache_ttl_seconds": self.cache_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "not_found": len(self.not_found),
+            "not_found_hits": self.not_found_hits,
+            "coalesced": self.coalesced,
+            "inflight": len(self.inflight),
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+            "short_circuited": self.short_circuited,
+            "breaker": self.breaker.stats(),
+        }
+
+
+# Global client, built on first use
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        client = WeatherClient(api_key=read_api_key())
+    return client
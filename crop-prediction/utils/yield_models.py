@@ -0,0 +1,175 @@
+"""
+Cropyield RNN yield classifier for serving
+Loads the Keras models trained in Crop-Yield-Prediction-using-Machine-Learning-Algorithms (by the
+Tkinter app or train_pipeline.py) once, with the encoders saved next to them, and scores batches
+of State / District / Year / Season / Crop / Area rows as LESS or HIGH yield. Also exposes the
+project's state x crop production analytics (analytics.py).
+"""
+import importlib.util
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+
+CROPYIELD_DIR = os.environ.get("CROPYIELD_DIR", "../Crop-Yield-Prediction-using-Machine-Learning-Algorithms")
+MODEL_DIR = os.environ.get("CROPYIELD_MODEL_DIR", os.path.join(CROPYIELD_DIR, "model"))
+DATASET = os.environ.get("CROPYIELD_DATASET", os.path.join(CROPYIELD_DIR, "dataset", "Agriculture In India.csv"))
+RAINFALL_CSV = os.path.join(CROPYIELD_DIR, "dataset", "district wise rainfall normal.csv")
+# Shared with Cropyield.topGraph() so either side can build the analytics cache
+CACHE_DIR = os.path.join(CROPYIELD_DIR, "cache")
+
+# Rows per forward pass; large enough to amortize the call, small enough to bound memory
+PREDICT_BATCH = int(os.environ.get("CROPYIELD_PREDICT_BATCH", 8192))
+
+# The LSTM artifact in model/ is stale (5-feature input, no weights); add 'lstm' back once it is
+# retrained with train_pipeline.py
+MODELS = ['rnn']
+LABELS = ['LESS', 'HIGH']
+
+# Request field -> dataset column
+FEATURE_FIELDS = {
+    'State_Name': 'state',
+    'District_Name': 'district',
+    'Crop_Year': 'year',
+    'Season': 'season',
+    'Crop': 'crop',
+    'Area': 'area',
+}
+
+
+def load_cropyield_module(name):
+    """A module of the Cropyield project, loaded by path (it isn't an installed package)"""
+    path = os.path.join(CROPYIELD_DIR, f"{name}.py")
+    spec = importlib.util.spec_from_file_location(f"cropyield_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_preprocessing():
+    return load_cropyield_module("preprocessing")
+
+
+def load_feature_encoder(model_dir=MODEL_DIR):
+    """
+    The encoders saved with the models. Models trained before encoders were saved used the
+    full dataset's vocabulary and scaling, so that is rebuilt in memory when the file is missing;
+    nothing is written to the model directory.
+    """
+    preprocessing = load_preprocessing()
+    path = os.path.join(model_dir, preprocessing.PREPROCESSING_FILE)
+    if os.path.exists(path):
+        return preprocessing.FeatureEncoder.load(path)
+
+    print(f"⚠ {path} not found, fitting encoders from {DATASET} for this process only. "
+          f"Retrain with train_pipeline.py (or run Preprocess in Cropyield.py) to save them with the models.")
+    return preprocessing.FeatureEncoder(preprocessing.scan(DATASET))
+
+
+def weights_path(model_dir, name):
+    """Keras 3 names weights <name>model.weights.h5, the GUI <name>model_weights.h5"""
+    for filename in (f"{name}model.weights.h5", f"{name}model_weights.h5"):
+        path = os.path.join(model_dir, filename)
+        if os.path.exists(path):
+            return path
+    raise Exception(f"No weights for '{name}' in {model_dir}")
+
+
+class KerasClassifier:
+    """One model loaded from <name>model.json and its weights, with a traced inference function"""
+    def __init__(self, name, model_dir=MODEL_DIR, features=None):
+        import tensorflow as tf
+
+        with open(os.path.join(model_dir, f"{name}model.json")) as json_file:
+            self.model = tf.keras.models.model_from_json(json_file.read())
+        self.name = name
+
+        # (None, features) for the dense models, (None, features, 1) for the LSTM
+        self.input_shape = tuple(self.model.input_shape[1:])
+        if features is not None and self.input_shape[0] != len(features):
+            raise Exception(f"{name}model.json expects {self.input_shape[0]} input features but the encoder "
+                            f"produces {len(features)} ({', '.join(features)}); retrain it with train_pipeline.py")
+        self.model.load_weights(weights_path(model_dir, name))
+        signature = [tf.TensorSpec((None,) + self.input_shape, tf.float32)]
+        self.infer = tf.function(lambda x: self.model(x, training=False), input_signature=signature)
+        self.predict_proba(np.zeros((1, self.input_shape[0]), dtype=np.float32))
+
+    def predict_proba(self, X):
+        """(rows, 2) class probabilities, in PREDICT_BATCH slices"""
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((len(X), 2), dtype=np.float32)
+        for start in range(0, len(X), PREDICT_BATCH):
+            batch = X[start:start + PREDICT_BATCH].reshape((-1,) + self.input_shape)
+            out[start:start + len(batch)] = self.infer(batch).numpy()
+        return out
+
+
+class YieldClassifier:
+    """The shared encoders plus every model that could be loaded"""
+    def __init__(self, model_dir=MODEL_DIR, names=MODELS):
+        start = time.perf_counter()
+        self.encoder = load_feature_encoder(model_dir)
+        self.models = {}
+        self.errors = {}
+        for name in names:
+            try:
+                self.models[name] = KerasClassifier(name, model_dir, self.encoder.features)
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"⚠ Could not load the {name.upper()} model: {e}")
+        if self.models:
+            print(f"✓ Yield models loaded: {', '.join(self.models)} ({time.perf_counter() - start:.1f}s)")
+
+    def frame(self, rows):
+        """DataFrame in the dataset's column names from request dicts"""
+        return pd.DataFrame({column: [row[field] for row in rows] for column, field in FEATURE_FIELDS.items()})
+
+    def predict(self, frame, model='rnn'):
+        """{"labels", "probability_high", "unseen"} for a DataFrame of feature columns"""
+        if model not in self.models:
+            raise Exception(f"Model '{model}' is not available: {self.errors.get(model, 'not loaded')}")
+        X, unseen = self.encoder.transform(frame)
+        probabilities = self.models[model].predict_proba(X)
+        return {
+            "labels": np.array(LABELS)[probabilities.argmax(axis=1)],
+            "probability_high": probabilities[:, 1],
+            "unseen": unseen,
+        }
+
+    def info(self):
+        return {
+            "models": {name: {"input_shape": list(m.input_shape), "parameters": int(m.model.count_params())}
+                       for name, m in self.models.items()},
+            "unavailable": self.errors,
+            "features": self.encoder.features,
+            "vocabulary": {column: len(classes) for column, classes in self.encoder.categorical.items()},
+        }
+
+
+# Global classifier, loaded on first use
+classifier = None
+classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    global classifier
+    if classifier is None:
+        with classifier_lock:
+            if classifier is None:
+                classifier = YieldClassifier()
+    return classifier
+
+
+# Global production analytics, loaded on first use
+analytics = None
+
+
+def get_analytics():
+    global analytics
+    if analytics is None:
+        with classifier_lock:
+            if analytics is None:
+                analytics = load_cropyield_module("analytics").load_or_build(DATASET, RAINFALL_CSV, CACHE_DIR)
+    return analytics
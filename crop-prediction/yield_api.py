@@ -2,15 +2,20 @@
 Crop Yield Prediction API
 Uses simplified ML approach based on the trained RNN model
 """
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Union
+import json
 import numpy as np
 from datetime import datetime
+from utils import crop_stats, executor, name_resolver
 
 app = FastAPI(title="Crop Yield Prediction API")
 
+MAX_SWEEP_POINTS = 250000
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,26 +36,50 @@ class YieldInputs(BaseModel):
     season: str = None  # Optional season (Kharif, Rabi, Whole Year)
 
 
+class SweepRange(BaseModel):
+    """Either an explicit list of values or an inclusive start/stop range with `steps` points"""
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = Field(10, ge=1, le=MAX_SWEEP_POINTS)
+    values: Optional[List[float]] = Field(None, max_length=MAX_SWEEP_POINTS)
+
+    @model_validator(mode='after')
+    def check_range(self):
+        if self.values is not None:
+            if not self.values:
+                raise ValueError("'values' must not be empty")
+        elif self.start is None or self.stop is None:
+            raise ValueError("Give either 'values' or both 'start' and 'stop'")
+        elif self.start > self.stop:
+            raise ValueError("'start' must not be greater than 'stop'")
+        return self
+
+    def to_array(self):
+        if self.values is not None:
+            return np.asarray(self.values, dtype=np.float64)
+        return np.linspace(self.start, self.stop, self.steps)
+
+
+class YieldSweepInputs(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    crop: str
+    state: str
+    rainfall: Union[float, SweepRange]  # mm
+    fertilizer: Union[float, SweepRange]  # kg/acre
+    area: Union[float, SweepRange] = 1.0  # acres
+    objective: Literal["yieldPerAcre", "estimatedYield", "confidence"] = "yieldPerAcre"
+
+
 # Load historical crop data for better predictions
 def load_crop_statistics():
-    """Load average production statistics by crop and state"""
+    """Load average production statistics by crop and state into a CropStatsIndex"""
     try:
-        df = pd.read_csv('../Crop-Yield-Prediction-using-Machine-Learning-Algorithms/dataset/Agriculture In India.csv')
-        df = df.dropna()
-        
-        # Calculate average yield per acre by crop and state
-        df['Yield_Per_Acre'] = df['Production'] / df['Area']
-        
-        # Group by crop and state to get averages
-        stats = df.groupby(['Crop', 'State_Name']).agg({
-            'Yield_Per_Acre': ['mean', 'std', 'min', 'max'],
-            'Area': 'mean',
-            'Production': 'mean'
-        }).reset_index()
-        
-        stats.columns = ['Crop', 'State', 'Avg_Yield', 'Std_Yield', 'Min_Yield', 'Max_Yield', 'Avg_Area', 'Avg_Production']
-        
-        return stats
+        # Served from a memory-mapped cache when it matches the CSV's hash
+        index = crop_stats.load_or_build(crop_stats.AGRICULTURE_CSV)
+        # Let the shared resolver map misspelled / abbreviated states onto the dataset's names
+        name_resolver.get_resolver().register('crop_stats', ((state, None) for state in set(index.states)))
+        return index
     except Exception as e:
         print(f"Warning: Could not load historical data: {e}")
         return None
@@ -89,33 +118,34 @@ def normalize_crop_name(crop_input):
 
 
 def normalize_state_name(state_input):
-    """Normalize state name to match dataset"""
-    state_mapping = {
-        'punjab': 'Punjab',
-        'haryana': 'Haryana',
-        'uttar pradesh': 'Uttar Pradesh',
-        'up': 'Uttar Pradesh',
-        'maharashtra': 'Maharashtra',
-        'karnataka': 'Karnataka',
-        'tamil nadu': 'Tamil Nadu',
-        'tn': 'Tamil Nadu',
-        'west bengal': 'West Bengal',
-        'wb': 'West Bengal',
-        'madhya pradesh': 'Madhya Pradesh',
-        'mp': 'Madhya Pradesh',
-        'rajasthan': 'Rajasthan',
-        'gujarat': 'Gujarat',
-        'bihar': 'Bihar',
-        'andhra pradesh': 'Andhra Pradesh',
-        'ap': 'Andhra Pradesh',
-        'kerala': 'Kerala',
-        'odisha': 'Odisha',
-        'orissa': 'Odisha',
-        'assam': 'Assam',
-    }
-    
-    state_lower = state_input.lower().strip()
-    return state_mapping.get(state_lower, state_input.title())
+    """Normalize state name to match dataset, tolerating misspellings and abbreviations"""
+    if CROP_STATS is not None:
+        match = name_resolver.get_resolver().resolve(state_input, source='crop_stats')
+        if match is not None:
+            return match["state"]
+    return state_input.strip().title()
+
+
+# Optimal rainfall (mm) and fertilizer (kg/acre) ranges by crop
+RAINFALL_OPTIMAL = {
+    'Rice': (1000, 2000),
+    'Wheat': (400, 650),
+    'Cotton(lint)': (600, 1200),
+    'Sugarcane': (1500, 2500),
+    'Maize': (600, 1200),
+}
+DEFAULT_RAINFALL_RANGE = (600, 1200)
+
+FERTILIZER_OPTIMAL = {
+    'Rice': (120, 180),
+    'Wheat': (140, 200),
+    'Cotton(lint)': (150, 220),
+    'Sugarcane': (200, 300),
+    'Maize': (120, 180),
+}
+DEFAULT_FERTILIZER_RANGE = (100, 200)
+
+DEFAULT_YIELD_PER_ACRE = 2.5  # tons per acre when there is no history for the crop/state
 
 
 def predict_yield_ml(area, rainfall, fertilizer, crop, state):
@@ -130,39 +160,24 @@ def predict_yield_ml(area, rainfall, fertilizer, crop, state):
     
     # Factor 1: Historical crop-state performance
     if CROP_STATS is not None:
-        matching_stats = CROP_STATS[
-            (CROP_STATS['Crop'].str.contains(crop_normalized, case=False, na=False)) &
-            (CROP_STATS['State'].str.contains(state_normalized, case=False, na=False))
-        ]
+        row = CROP_STATS.find(crop_normalized, state_normalized)
         
-        if not matching_stats.empty:
-            avg_yield = matching_stats['Avg_Yield'].values[0]
-            std_yield = matching_stats['Std_Yield'].values[0]
-            
-            # Estimate expected yield per acre
-            expected_yield = avg_yield
+        if row is not None:
+            avg_yield = CROP_STATS.values[row, crop_stats.AVG_YIELD]
             
             # Adjust based on area (economies of scale)
-            if area > matching_stats['Avg_Area'].values[0]:
+            if area > CROP_STATS.values[row, crop_stats.AVG_AREA]:
                 score += 5
             
             # Store for later use
-            base_yield_per_acre = avg_yield
+            base_yield_per_acre = float(avg_yield)
         else:
-            base_yield_per_acre = 2.5  # Default tons per acre
+            base_yield_per_acre = DEFAULT_YIELD_PER_ACRE
     else:
-        base_yield_per_acre = 2.5
+        base_yield_per_acre = DEFAULT_YIELD_PER_ACRE
     
     # Factor 2: Rainfall impact (optimal ranges by crop)
-    rainfall_optimal = {
-        'Rice': (1000, 2000),
-        'Wheat': (400, 650),
-        'Cotton(lint)': (600, 1200),
-        'Sugarcane': (1500, 2500),
-        'Maize': (600, 1200),
-    }
-    
-    optimal_range = rainfall_optimal.get(crop_normalized, (600, 1200))
+    optimal_range = RAINFALL_OPTIMAL.get(crop_normalized, DEFAULT_RAINFALL_RANGE)
     if optimal_range[0] <= rainfall <= optimal_range[1]:
         score += 20
     elif rainfall < optimal_range[0]:
@@ -173,15 +188,7 @@ def predict_yield_ml(area, rainfall, fertilizer, crop, state):
         score -= excess * 20
     
     # Factor 3: Fertilizer impact
-    fertilizer_optimal = {
-        'Rice': (120, 180),
-        'Wheat': (140, 200),
-        'Cotton(lint)': (150, 220),
-        'Sugarcane': (200, 300),
-        'Maize': (120, 180),
-    }
-    
-    fert_range = fertilizer_optimal.get(crop_normalized, (100, 200))
+    fert_range = FERTILIZER_OPTIMAL.get(crop_normalized, DEFAULT_FERTILIZER_RANGE)
     if fert_range[0] <= fertilizer <= fert_range[1]:
         score += 20
     elif fertilizer < fert_range[0]:
@@ -240,12 +247,206 @@ def predict_yield_ml(area, rainfall, fertilizer, crop, state):
     }
 
 
+def score_yield(area, rainfall, fertilizer, rain_low, rain_high, fert_low, fert_high, base_yield, avg_area):
+    """
+    Vectorized predict_yield_ml scoring. All arguments are arrays (or scalars) that
+    broadcast together; avg_area is +inf where there is no history for the crop/state.
+    Returns (score, yield_per_acre, total_yield) arrays.
+    """
+    area = np.asarray(area, dtype=np.float64)
+    rainfall = np.asarray(rainfall, dtype=np.float64)
+    fertilizer = np.asarray(fertilizer, dtype=np.float64)
+
+    # Factor 1: economies of scale against the historical average area
+    score = 50 + np.where(area > avg_area, 5.0, 0.0)
+
+    # Factor 2: rainfall
+    score = np.where(
+        (rain_low <= rainfall) & (rainfall <= rain_high), score + 20,
+        np.where(rainfall < rain_low,
+                 score - (rain_low - rainfall) / rain_low * 30,
+                 score - (rainfall - rain_high) / rain_high * 20))
+
+    # Factor 3: fertilizer
+    score = np.where(
+        (fert_low <= fertilizer) & (fertilizer <= fert_high), score + 20,
+        np.where(fertilizer < fert_low,
+                 score + (fertilizer / fert_low) * 20,
+                 score + (20 - ((fertilizer - fert_high) / fert_high) * 10)))
+
+    # Factor 4: area feasibility
+    score = score + np.where(area < 0.5, -5.0, np.where(area > 20, 10.0, 0.0))
+
+    score = np.clip(score, 0, 100)
+    yield_per_acre = base_yield * (score / 50)
+    return score, yield_per_acre, yield_per_acre * area
+
+
+def crop_parameters(crops, states):
+    """
+    Per-row optimal ranges and historical stats, resolved once per distinct (crop, state).
+    Returns normalized names plus float arrays for score_yield.
+    """
+    crop_names = {crop: normalize_crop_name(crop) for crop in set(crops)}
+    state_names = {state: normalize_state_name(state) for state in set(states)}
+
+    pairs = {}
+    for crop, state in set(zip(crops, states)):
+        crop_normalized = crop_names[crop]
+        row = CROP_STATS.find(crop_normalized, state_names[state]) if CROP_STATS is not None else None
+        if row is not None:
+            base_yield = CROP_STATS.values[row, crop_stats.AVG_YIELD]
+            avg_area = CROP_STATS.values[row, crop_stats.AVG_AREA]
+        else:
+            base_yield, avg_area = DEFAULT_YIELD_PER_ACRE, np.inf
+        pairs[(crop, state)] = (
+            *RAINFALL_OPTIMAL.get(crop_normalized, DEFAULT_RAINFALL_RANGE),
+            *FERTILIZER_OPTIMAL.get(crop_normalized, DEFAULT_FERTILIZER_RANGE),
+            base_yield, avg_area,
+        )
+
+    params = np.array([pairs[key] for key in zip(crops, states)], dtype=np.float64).reshape(-1, 6)
+    return (
+        [crop_names[crop] for crop in crops],
+        [state_names[state] for state in states],
+        params.T,
+    )
+
+
+def predict_yield_batch(areas, rainfalls, fertilizers, crops, states):
+    """
+    Score many farms in one vectorized pass; same results as predict_yield_ml per row.
+    Rows failing the /predict-yield/ input checks come back as {"success": False, "error": ...}.
+    """
+    area = np.asarray(areas, dtype=np.float64)
+    rainfall = np.asarray(rainfalls, dtype=np.float64)
+    fertilizer = np.asarray(fertilizers, dtype=np.float64)
+
+    crop_names, state_names, (rain_low, rain_high, fert_low, fert_high, base_yield, avg_area) = \
+        crop_parameters(list(crops), list(states))
+
+    score, yield_per_acre, total_yield = score_yield(
+        area, rainfall, fertilizer, rain_low, rain_high, fert_low, fert_high, base_yield, avg_area)
+
+    category = np.where(score >= 60, "HIGH", np.where(score >= 40, "MEDIUM", "LOW"))
+
+    # Recommendation flags, mirroring predict_yield_ml
+    rain_short = rainfall < rain_low * 0.8
+    rain_excess = ~rain_short & (rainfall > rain_high * 1.2)
+    fert_short = fertilizer < fert_low
+    fert_excess = ~fert_short & (fertilizer > fert_high * 1.5)
+    small_farm = area < 1
+    suboptimal = score < 50
+
+    errors = np.where(area <= 0, "Area must be greater than 0",
+             np.where(rainfall < 0, "Rainfall cannot be negative",
+             np.where(fertilizer < 0, "Fertilizer cannot be negative", "")))
+
+    # Plain Python lists make the per-row assembly below much cheaper than numpy scalar indexing
+    errors, category, score, yield_per_acre, total_yield, fert_low, fert_high = (
+        column.tolist() for column in (errors, category, score, yield_per_acre, total_yield, fert_low, fert_high))
+    rain_short, rain_excess, fert_short, fert_excess, small_farm, suboptimal = (
+        flags.tolist() for flags in (rain_short, rain_excess, fert_short, fert_excess, small_farm, suboptimal))
+
+    results = []
+    for i in range(len(errors)):
+        if errors[i]:
+            results.append({"success": False, "error": errors[i]})
+            continue
+
+        crop_normalized = crop_names[i]
+        recommendations = []
+        if rain_short[i]:
+            recommendations.append(f"Rainfall is low for {crop_normalized}. Consider irrigation systems.")
+        elif rain_excess[i]:
+            recommendations.append(f"Excessive rainfall expected. Ensure proper drainage.")
+        if fert_short[i]:
+            recommendations.append(f"Increase fertilizer application to {fert_low[i]:g}-{fert_high[i]:g} kg/acre for optimal yield.")
+        elif fert_excess[i]:
+            recommendations.append(f"Reduce fertilizer to avoid soil degradation and runoff.")
+        if small_farm[i]:
+            recommendations.append("Small farm size. Focus on intensive farming techniques.")
+        if suboptimal[i]:
+            recommendations.append(f"Conditions are suboptimal for {crop_normalized} in {state_names[i]}. Consider alternative crops.")
+        if not recommendations:
+            recommendations.append(f"Excellent conditions for {crop_normalized} cultivation! Follow standard practices.")
+
+        results.append({
+            "success": True,
+            "yieldCategory": category[i],
+            "estimatedYield": round(total_yield[i], 2),
+            "yieldPerAcre": round(yield_per_acre[i], 2),
+            "confidence": round(score[i], 1),
+            "recommendations": recommendations,
+            "cropMatched": crop_normalized,
+            "stateMatched": state_names[i]
+        })
+
+    return results
+
+
+MAX_BATCH_ROWS = 100000
+STREAM_CHUNK_ROWS = 1000
+
+
+def sweep_yield(crop, state, rainfall_values, fertilizer_values, area_values, objective="yieldPerAcre"):
+    """
+    Evaluate predict_yield_ml over the full rainfall x fertilizer x area grid in one
+    broadcast pass. Surfaces are indexed [rainfall][fertilizer][area].
+    """
+    rainfall = np.atleast_1d(np.asarray(rainfall_values, dtype=np.float64))
+    fertilizer = np.atleast_1d(np.asarray(fertilizer_values, dtype=np.float64))
+    area = np.atleast_1d(np.asarray(area_values, dtype=np.float64))
+
+    if (area <= 0).any():
+        raise ValueError("Area must be greater than 0")
+    if (rainfall < 0).any():
+        raise ValueError("Rainfall cannot be negative")
+    if (fertilizer < 0).any():
+        raise ValueError("Fertilizer cannot be negative")
+    points = rainfall.size * fertilizer.size * area.size
+    if points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Grid too large: {points} points (max {MAX_SWEEP_POINTS})")
+
+    (crop_normalized,), (state_normalized,), params = crop_parameters([crop], [state])
+    rain_low, rain_high, fert_low, fert_high, base_yield, avg_area = params[:, 0]
+
+    score, yield_per_acre, total_yield = score_yield(
+        area[None, None, :], rainfall[:, None, None], fertilizer[None, :, None],
+        rain_low, rain_high, fert_low, fert_high, base_yield, avg_area)
+
+    surfaces = {"confidence": score, "yieldPerAcre": yield_per_acre, "estimatedYield": total_yield}
+    r, f, a = np.unravel_index(np.argmax(surfaces[objective]), score.shape)
+    best_score = float(score[r, f, a])
+
+    return {
+        "cropMatched": crop_normalized,
+        "stateMatched": state_normalized,
+        "objective": objective,
+        "axes": {
+            "rainfall": rainfall.tolist(),
+            "fertilizer": fertilizer.tolist(),
+            "area": area.tolist(),
+        },
+        "surface": {name: np.round(values, 2).tolist() for name, values in surfaces.items()},
+        "best": {
+            "rainfall": float(rainfall[r]),
+            "fertilizer": float(fertilizer[f]),
+            "area": float(area[a]),
+            "confidence": round(best_score, 1),
+            "yieldPerAcre": round(float(yield_per_acre[r, f, a]), 2),
+            "estimatedYield": round(float(total_yield[r, f, a]), 2),
+            "yieldCategory": "HIGH" if best_score >= 60 else "MEDIUM" if best_score >= 40 else "LOW",
+        },
+    }
+
+
 @app.get("/")
 async def root():
     return {
         "message": "Crop Yield Prediction API",
         "version": "1.0",
-        "endpoints": ["/predict-yield/"]
+        "endpoints": ["/predict-yield/", "/predict-yield/batch", "/predict-yield/sweep"]
     }
 
 
@@ -270,7 +471,7 @@ async def predict_yield(inputs: YieldInputs):
             raise HTTPException(status_code=400, detail="Fertilizer cannot be negative")
         
         # Get prediction
-        prediction = predict_yield_ml(area, rainfall, fertilizer, crop, state)
+        prediction = await executor.run("predict-yield", predict_yield_ml, area, rainfall, fertilizer, crop, state)
         
         return {
             "success": True,
@@ -284,6 +485,60 @@ async def predict_yield(inputs: YieldInputs):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict-yield/batch")
+async def predict_yield_batch_endpoint(inputs: List[YieldInputs]):
+    """
+    Score a catalog of farm parcels in one pass.
+    Streams newline-delimited JSON, one {"index": i, ...} object per input row.
+    """
+    if len(inputs) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(inputs)} rows (max {MAX_BATCH_ROWS})")
+
+    results = await executor.run(
+        "predict-yield-batch", predict_yield_batch,
+        [row.area for row in inputs],
+        [row.rainfall for row in inputs],
+        [row.fertilizer for row in inputs],
+        [row.crop for row in inputs],
+        [row.state for row in inputs],
+    )
+
+    def stream():
+        for start in range(0, len(results), STREAM_CHUNK_ROWS):
+            chunk = results[start:start + STREAM_CHUNK_ROWS]
+            yield "".join(
+                json.dumps({"index": start + i, **result}) + "\n" for i, result in enumerate(chunk))
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/predict-yield/sweep")
+async def predict_yield_sweep(inputs: YieldSweepInputs):
+    """
+    What-if sweep: evaluate a grid of rainfall, fertilizer and area values for one crop and
+    state, returning the yield surface and the best point for the chosen objective
+    """
+    def axis(value):
+        return value.to_array() if isinstance(value, SweepRange) else np.array([value])
+
+    try:
+        result = await executor.run(
+            "predict-yield-sweep", sweep_yield, inputs.crop, inputs.state,
+            axis(inputs.rainfall), axis(inputs.fertilizer), axis(inputs.area), inputs.objective)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"success": True, **result}
+
+
+@app.get("/executor/")
+async def executor_stats():
+    """Worker pool queue depth and per-endpoint rejection counts"""
+    return executor.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
@@ -0,0 +1,161 @@
+"""
+Crop Yield Classification API
+Serves the Cropyield RNN model: batches of State / District / Year / Season / Crop / Area rows
+are classified as LESS or HIGH yield in the shared inference pool. The LSTM in model/ is not
+served: its lstmmodel.json predates the 6-feature encoder and has no weights. Top-k production and
+rainfall queries for the dashboard come from the cached analytics cube.
+"""
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ConfigDict
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from typing import List, Literal
+import os
+from utils import executor, yield_models
+
+
+MAX_BATCH_ROWS = int(os.environ.get("YIELD_MODEL_MAX_ROWS", 100000))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await executor.run("yield-model-load", yield_models.get_classifier)
+    except Exception as e:
+        print(f"⚠ Yield models not loaded: {e}")
+    try:
+        await executor.run("yield-model-load", yield_models.get_analytics)
+    except Exception as e:
+        print(f"⚠ Production analytics not loaded: {e}")
+    yield
+
+
+app = FastAPI(title="Crop Yield Classification API", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+class YieldRow(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    state: str
+    district: str
+    year: int
+    season: str  # Kharif, Rabi, Whole Year, ...
+    crop: str
+    area: float  # hectares, as in the training data
+
+
+class ClassifyInputs(BaseModel):
+    model: Literal['rnn'] = 'rnn'
+    rows: List[YieldRow]
+
+
+def get_classifier():
+    try:
+        return yield_models.get_classifier()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Yield models unavailable: {e}")
+
+
+def run_query(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def classify(classifier, rows, model):
+    frame = classifier.frame(rows)
+    result = classifier.predict(frame, model)
+    probabilities = result["probability_high"].round(4).tolist()
+    return {
+        "unseen": result["unseen"],
+        "results": [{"yield": label, "probability_high": p}
+                    for label, p in zip(result["labels"].tolist(), probabilities)],
+    }
+
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Crop Yield Classification API",
+        "endpoints": ["/classify-yield/", "/models/", "/analytics/top-states", "/analytics/top-crops",
+                      "/analytics/top-pairs", "/analytics/top-rainfall", "/analytics/crops", "/executor/"],
+    }
+
+
+@app.get("/models/")
+async def models():
+    return get_classifier().info()
+
+
+@app.post("/classify-yield/")
+async def classify_yield(inputs: ClassifyInputs):
+    """
+    LESS / HIGH yield for each row, with the model's probability of HIGH. `unseen` counts rows
+    whose state, district, season or crop was not in the training data (encoded as the mean).
+    """
+    if not inputs.rows:
+        raise HTTPException(status_code=400, detail="No rows to classify")
+    if len(inputs.rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(inputs.rows)} rows (max {MAX_BATCH_ROWS})")
+
+    classifier = get_classifier()
+    if inputs.model not in classifier.models:
+        raise HTTPException(status_code=503, detail=f"Model '{inputs.model}' is not available: "
+                                                    f"{classifier.errors.get(inputs.model, 'not loaded')}")
+    rows = [row.model_dump() for row in inputs.rows]
+    try:
+        result = await executor.run("classify-yield", classify, classifier, rows, inputs.model)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"model": inputs.model, "count": len(rows), **result}
+
+
+@app.get("/analytics/top-states")
+async def top_states(crop: str, k: int = Query(6, ge=1, le=100)):
+    """States with the largest total production of a crop"""
+    return {"crop": crop, "results": run_query(yield_models.get_analytics().top_states, crop, k)}
+
+
+@app.get("/analytics/top-crops")
+async def top_crops(state: str, k: int = Query(6, ge=1, le=100)):
+    """A state's largest crops by total production"""
+    return {"state": state, "results": run_query(yield_models.get_analytics().top_crops, state, k)}
+
+
+@app.get("/analytics/top-pairs")
+async def top_pairs(k: int = Query(6, ge=1, le=1000)):
+    """Largest state / crop production totals across every crop"""
+    return {"results": yield_models.get_analytics().top_pairs(k)}
+
+
+@app.get("/analytics/top-rainfall")
+async def top_rainfall(k: int = Query(6, ge=1, le=100)):
+    """States with the most district annual rainfall"""
+    return {"results": yield_models.get_analytics().top_rainfall(k)}
+
+
+@app.get("/analytics/crops")
+async def analytics_crops():
+    return {"crops": sorted(crop.strip() for crop in yield_models.get_analytics().crops)}
+
+
+@app.get("/executor/")
+async def executor_stats():
+    """Worker pool queue depth and per-endpoint rejection counts"""
+    return executor.stats()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8004)